@@ -0,0 +1,57 @@
+"""Cold-start cost of the serving and CLI entry points.
+
+Runs each entry point in a fresh interpreter under ``python -X importtime``
+and reports the summed self time of every import plus the wall time of the
+whole process (best of BENCH_RUNS):
+
+    python benchmarks/import_time.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RUNS = int(os.getenv("BENCH_RUNS", "5"))
+TOP = int(os.getenv("BENCH_TOP", "8"))
+
+ENTRY_POINTS = {
+    "package import": "import lab2_app",
+    "serving (lab2_app.wsgi)": "from lab2_app.wsgi import app",
+    "cli (create_app())": "from lab2_app import create_app; create_app()",
+    "cli, no openapi": "from lab2_app import create_app; create_app({'OPENAPI_ENABLED': False})",
+}
+
+
+def run(code):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    env.setdefault("JWT_SECRET_KEY", "import-time-bench-secret-0123456789abcdef")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative_us), int(self_us), name.strip()))
+    return wall, modules
+
+
+def main():
+    for label, code in ENTRY_POINTS.items():
+        results = [run(code) for _ in range(RUNS)]
+        wall, modules = min(results, key=lambda r: r[0])
+        total = sum(self_us for _, self_us, _ in modules)
+        print(f"{label:26} wall {wall * 1000:7.1f} ms  imports {total / 1000:7.1f} ms  modules {len(modules)}")
+        top_level = sorted((m for m in modules if not m[2].startswith(" ")), reverse=True)[:TOP]
+        for cumulative_us, _, name in top_level:
+            print(f"    {cumulative_us / 1000:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
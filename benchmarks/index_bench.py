@@ -0,0 +1,95 @@
+"""Insert throughput and GET /record query latency for the current indexes.
+
+Run once per schema revision against a scratch Postgres database, e.g.
+
+    flask db upgrade 9d2a61f0b8e4 && python benchmarks/index_bench.py > before.txt
+    flask db upgrade && python benchmarks/index_bench.py > after.txt
+
+The script appends BENCH_ROWS synthetic records for the seeded users and
+removes them again at the end.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from lab2_app import create_app, db  # noqa: E402
+from lab2_app.IndexAudit import report  # noqa: E402
+from lab2_app.Models import Category, Record, User  # noqa: E402
+
+app = create_app()
+
+ROWS = int(os.getenv("BENCH_ROWS", "200000"))
+BATCH = int(os.getenv("BENCH_BATCH", "5000"))
+QUERIES = int(os.getenv("BENCH_QUERIES", "500"))
+
+
+def insert_rows(user_ids, category_ids):
+    rng = random.Random(42)
+    start = datetime.now(timezone.utc) - timedelta(days=60)
+    first_id = None
+    began = time.perf_counter()
+    for offset in range(0, ROWS, BATCH):
+        rows = [
+            {
+                "user_id": rng.choice(user_ids),
+                "category_id": rng.choice(category_ids),
+                "datetime": start + timedelta(seconds=rng.randrange(60 * 86400)),
+                "amount_minor": rng.randrange(1, 100000),
+            }
+            for _ in range(min(BATCH, ROWS - offset))
+        ]
+        ids = db.session.execute(insert(Record).returning(Record.id), rows).scalars().all()
+        first_id = min(ids) if first_id is None else first_id
+        db.session.commit()
+    return ROWS / (time.perf_counter() - began), first_id
+
+
+def query_latency(column, values):
+    samples = []
+    for i in range(QUERIES):
+        q = (
+            select(Record.id, Record.user_id, Record.category_id, Record.datetime, Record.amount_minor)
+            .where(column == values[i % len(values)])
+            .order_by(Record.datetime.desc(), Record.id.desc())
+            .limit(100)
+        )
+        began = time.perf_counter()
+        db.session.execute(q).all()
+        samples.append(time.perf_counter() - began)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    with app.app_context():
+        user_ids = db.session.execute(select(User.id)).scalars().all()
+        category_ids = db.session.execute(
+            select(Category.id).where(Category.owner_id.is_(None))
+        ).scalars().all()
+        if not user_ids or not category_ids:
+            sys.exit("seed the database first (flask test_data)")
+
+        print(report(db.metadata))
+        rate, first_id = insert_rows(user_ids, category_ids)
+        print(f"insert: {rate:10.0f} rows/s")
+        db.session.execute(db.text("ANALYZE records"))
+        for name, column, values in (
+            ("by user", Record.user_id, user_ids),
+            ("by category", Record.category_id, category_ids),
+        ):
+            p50, p99 = query_latency(column, values)
+            print(f"GET /record {name:12} p50 {p50 * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms")
+
+        db.session.execute(delete(Record).where(Record.id >= first_id))
+        db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
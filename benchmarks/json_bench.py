@@ -0,0 +1,109 @@
+"""Cost of turning a 100k-row record listing into a JSON response.
+
+Compares ORM entities against a column-only select, and Flask's default JSON
+provider against the orjson one (JSON_PROVIDER), then times the streamed
+``GET /record?format=ndjson`` endpoint end to end with each provider:
+
+    python benchmarks/json_bench.py
+    BENCH_ROWS=1000000 DATABASE_URL=postgresql://... python benchmarks/json_bench.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/json_bench.db")
+os.environ.setdefault("JWT_SECRET_KEY", "json-bench-secret-0123456789abcdef0123")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from lab2_app import create_app, db  # noqa: E402
+from lab2_app.Json import OrjsonProvider  # noqa: E402
+from lab2_app.Models import Category, Record, User  # noqa: E402
+from lab2_app.Passwords import hash_password  # noqa: E402
+from lab2_app.views import _entry_item, _entry_items  # noqa: E402
+
+ROWS = int(os.getenv("BENCH_ROWS", "100000"))
+RUNS = int(os.getenv("BENCH_RUNS", "3"))
+CONFIG = {"MIGRATIONS_ENABLED": False, "OPENAPI_ENABLED": False}
+
+
+def seed():
+    db.create_all()
+    if db.session.execute(select(func.count()).select_from(Record)).scalar() == ROWS:
+        return
+    db.drop_all()
+    db.create_all()
+    db.session.add(User(name="bench", password=hash_password("12345")))
+    db.session.add(Category(name="bench"))
+    db.session.flush()
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        {"user_id": 1, "category_id": 1, "datetime": start + timedelta(seconds=i), "amount_minor": 100 + i}
+        for i in range(ROWS)
+    ]
+    for i in range(0, ROWS, 10000):
+        db.session.execute(insert(Record), rows[i:i + 10000])
+    db.session.commit()
+
+
+def query():
+    return select(Record.id, Record.user_id, Record.category_id, Record.datetime, Record.amount_minor) \
+        .where(Record.user_id == 1).order_by(Record.datetime.desc(), Record.id.desc())
+
+
+def orm_items():
+    records = db.session.execute(
+        select(Record).where(Record.user_id == 1).order_by(Record.datetime.desc(), Record.id.desc())
+    ).scalars().all()
+    items = [_entry_item(r) for r in records]
+    db.session.expunge_all()
+    return items
+
+
+def column_items():
+    return _entry_items(db.session.execute(query()))
+
+
+def best(fn):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    app = create_app(CONFIG)
+    providers = {"flask": DefaultJSONProvider(app), "orjson": OrjsonProvider(app)}
+    with app.app_context(), app.test_request_context():
+        seed()
+        print(f"{ROWS} rows, best of {RUNS}")
+        before_items, after_items = orm_items(), column_items()
+        before = best(orm_items), best(lambda: providers["flask"].response({"items": before_items}))
+        after = best(column_items), best(lambda: providers["orjson"].response({"items": after_items}))
+        for label, (fetch, encode) in (("orm + flask json", before), ("columns + orjson", after)):
+            print(f"  {label:18} fetch + dicts {fetch * 1000:8.1f} ms  encode {encode * 1000:8.1f} ms  "
+                  f"total {(fetch + encode) * 1000:8.1f} ms")
+        print(f"  speedup            fetch + dicts {before[0] / after[0]:7.1f}x   encode {before[1] / after[1]:7.1f}x  "
+              f"total {sum(before) / sum(after):7.1f}x")
+
+    for name in providers:
+        app = create_app({**CONFIG, "JSON_PROVIDER": name})
+        client = app.test_client()
+        with app.app_context():
+            token = client.post("/login", json={"name": "bench", "password": "12345"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def stream():
+            body = client.get(f"/record?user_id=1&format=ndjson", headers=headers).get_data()
+            assert body.count(b"\n") == ROWS
+
+        print(f"  GET /record ndjson {name:10} {best(stream) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""HTTP load test against a running server.
+
+Start the server in either mode and point this script at it:
+
+    SERVER_MODE=development sh serve.sh   # flask run
+    SERVER_MODE=production sh serve.sh    # gunicorn
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --seconds 20 --concurrency 32
+
+Needs seeded data (``flask test_data``) for the login user.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+ENDPOINTS = [
+    ("GET", "/healthcheck"),
+    ("GET", "/category"),
+    ("GET", "/users"),
+    ("GET", "/record?user_id=1"),
+    ("GET", "/user/1"),
+]
+
+
+def percentile(samples, p):
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def login(url, name, password):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+    conn.request("POST", "/login", json.dumps({"name": name, "password": password}),
+                 {"Content-Type": "application/json"})
+    body = json.loads(conn.getresponse().read())
+    conn.close()
+    return body["access_token"]
+
+
+def worker(url, headers, deadline, results, lock):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+    local = {path: [] for _, path in ENDPOINTS}
+    errors = 0
+    i = 0
+    while time.monotonic() < deadline:
+        method, path = ENDPOINTS[i % len(ENDPOINTS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 500:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+            continue
+        local[path].append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        for path, samples in local.items():
+            results[path].extend(samples)
+        results["errors"] += errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--user", default="Nazar")
+    parser.add_argument("--password", default="12345")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {login(args.url, args.user, args.password)}"}
+    results = {path: [] for _, path in ENDPOINTS}
+    results["errors"] = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+    threads = [
+        threading.Thread(target=worker, args=(args.url, headers, deadline, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    total = 0
+    for _, path in ENDPOINTS:
+        samples = results[path]
+        total += len(samples)
+        print(f"{path:24} {len(samples) / args.seconds:9.1f} req/s  "
+              f"p50 {percentile(samples, 0.50) * 1000:7.1f} ms  p99 {percentile(samples, 0.99) * 1000:7.1f} ms")
+    print(f"{'total':24} {total / args.seconds:9.1f} req/s  errors {results['errors']}")
+
+
+if __name__ == "__main__":
+    main()
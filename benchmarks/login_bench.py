@@ -0,0 +1,77 @@
+"""Sustained login throughput and p99 latency.
+
+Runs concurrent POST /login calls next to a stream of authenticated
+GET /users reads and reports both, so hash rounds and the verify slot
+count can be compared:
+
+    PASSWORD_HASH_ROUNDS=29000 PASSWORD_VERIFY_SLOTS=64 python benchmarks/login_bench.py
+    PASSWORD_HASH_ROUNDS=29000 PASSWORD_VERIFY_SLOTS=2 python benchmarks/login_bench.py
+"""
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/login_bench.db")
+os.environ.setdefault("JWT_SECRET_KEY", "login-bench-secret-key-0123456789abcdef")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from lab2_app import create_app, db  # noqa: E402
+from lab2_app.Data import test_data  # noqa: E402
+
+app = create_app()
+
+DURATION = float(os.getenv("BENCH_SECONDS", "10"))
+LOGIN_THREADS = int(os.getenv("BENCH_LOGIN_THREADS", "16"))
+READ_THREADS = int(os.getenv("BENCH_READ_THREADS", "4"))
+
+
+def percentile(samples, p):
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def worker(fn, samples, stop):
+    client = app.test_client()
+    while not stop.is_set():
+        start = time.perf_counter()
+        fn(client)
+        samples.append(time.perf_counter() - start)
+
+
+def main():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        test_data()
+
+    client = app.test_client()
+    token = client.post("/login", json={"name": "Nazar", "password": "12345"}).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def login(c):
+        c.post("/login", json={"name": "Olena", "password": "12345"})
+
+    def read(c):
+        c.get("/users", headers=headers)
+
+    stop = threading.Event()
+    logins, reads = [], []
+    threads = [threading.Thread(target=worker, args=(login, logins, stop)) for _ in range(LOGIN_THREADS)]
+    threads += [threading.Thread(target=worker, args=(read, reads, stop)) for _ in range(READ_THREADS)]
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"rounds={app.config['PASSWORD_HASH_ROUNDS']} verify_slots={app.config['PASSWORD_VERIFY_SLOTS']}")
+    print(f"login: {len(logins) / DURATION:8.1f}/s  p99 {percentile(logins, 0.99) * 1000:8.1f} ms")
+    print(f"reads: {len(reads) / DURATION:8.1f}/s  p99 {percentile(reads, 0.99) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Validation cost per request: marshmallow Schema.load vs the compiled validators.
+
+Loads representative payloads for the hot endpoints through each schema's
+marshmallow instance and through its compiled wrapper in Schemas.py, checks
+both return the same data, and prints microseconds per load (per batch for
+POST /record/bulk):
+
+    python benchmarks/validation_bench.py
+    BENCH_LOOPS=200000 python benchmarks/validation_bench.py
+"""
+import os
+import sys
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "validation-bench-secret-0123456789abcdef")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from lab2_app import Schemas, create_app  # noqa: E402
+
+LOOPS = int(os.getenv("BENCH_LOOPS", "50000"))
+BULK = int(os.getenv("BENCH_BULK", "5000"))
+
+RECORD = {"user_id": 12, "category_id": 3, "datetime": "2025-03-14T09:26:53+00:00", "amount": " 125.40 "}
+CASES = [
+    ("GET /record/<id>", Schemas.record_id_path_schema, lambda: {"record_id": 123456}),
+    ("GET /record", Schemas.record_query_schema,
+     lambda: {"user_id": 12, "limit": 100, "from": "2025-01-01T00:00:00", "format": "json"}),
+    ("GET /users", Schemas.user_query_schema,
+     lambda: {"limit": 50, "prefix": "ol", "cursor": Schemas.encode_id_cursor(500)}),
+    ("POST /record", Schemas.record_create_schema, lambda: dict(RECORD)),
+    ("POST /register", Schemas.user_create_schema, lambda: {"name": " olena ", "password": "secret"}),
+    (f"POST /record/bulk x{BULK}", Schemas.record_bulk_schema, lambda: [dict(RECORD) for _ in range(BULK)]),
+]
+
+
+def per_call(fn, make, loops):
+    # Payloads are built outside the timed call; marshmallow mutates them.
+    payloads = [make() for _ in range(loops)]
+    it = iter(payloads)
+    return timeit.timeit(lambda: fn(next(it)), number=loops) / loops
+
+
+def main():
+    app = create_app({"MIGRATIONS_ENABLED": False, "OPENAPI_ENABLED": False})
+    with app.app_context():
+        print(f"{'':28} {'marshmallow':>12} {'compiled':>12}")
+        for label, schema, make in CASES:
+            assert schema.load(make()) == schema.schema.load(make()), label
+            loops = max(LOOPS // BULK, 3) if schema.many else LOOPS
+            before = per_call(schema.schema.load, make, loops)
+            after = per_call(schema.load, make, loops)
+            print(f"  {label:26} {before * 1e6:9.2f} us {after * 1e6:9.2f} us  {before / after:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('FLASK_RUN_PORT', '8000')}"
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("WEB_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "0"))
+
+# Import the app once in the master so workers fork with everything loaded.
+preload_app = True
+accesslog = os.getenv("WEB_ACCESS_LOG")
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Connections opened before the fork must not be shared between workers.
+    from lab2_app import db
+    from lab2_app.wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
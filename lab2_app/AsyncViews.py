@@ -0,0 +1,255 @@
+"""asyncio serving mode: an ASGI app with async fast paths for the read endpoints.
+
+GET requests routed to read_entry, query_entries, read_kinds or read_people
+are answered on the event loop from SQLAlchemy's async engine, so a worker
+waiting on Postgres holds a coroutine instead of a thread. Everything else
+goes to the Flask app unchanged through a WSGI thread pool.
+
+The fast paths run inside a regular Flask request context built from the
+ASGI scope: routing, JWT verification (verify_jwt_in_request and its error
+handlers), before/after_request hooks, schemas, query builders and the JSON
+provider are the ones the sync views use. Only the database round trips
+differ.
+"""
+import asyncio
+import io
+import sys
+
+from a2wsgi import WSGIMiddleware
+from flask import current_app, g, request
+from flask_jwt_extended import verify_jwt_in_request
+from marshmallow import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from . import Metrics, Pool, Schemas, Tokens, views
+from .Cache import category_cache
+
+STREAM = object()
+
+
+async def read_entry(session, record_id):
+    try:
+        Schemas.record_id_path_schema.load({"record_id": record_id})
+    except ValidationError as e:
+        return {"error": "invalid record_id", "details": e.messages}, 400
+
+    rec = (await session.execute(views._entry_query(record_id))).first()
+    if rec is None:
+        return {"error": "record not found"}, 404
+
+    headers, not_modified = views._conditional(f"r{rec.id}-{rec.version}", rec.updated_at)
+    if not_modified:
+        return "", 304, headers
+    return views._entry_item(rec), 200, headers
+
+
+async def query_entries(session):
+    raw = views._entries_raw(request.args)
+    if "user_id" not in raw and "category_id" not in raw:
+        return {"error": "provide user_id and/or category_id"}, 400
+
+    try:
+        params = Schemas.record_query_schema.load(raw)
+    except ValidationError as e:
+        return {"error": "invalid query params", "details": e.messages}, 400
+
+    q = views._entries_query(params)
+    if params.get("format") == "ndjson":
+        if "limit" in params:
+            q = q.limit(params["limit"])
+        return STREAM, _stream_entries(session, q)
+
+    limit = params.get("limit", current_app.config.get("RECORDS_PAGE_SIZE", 100))
+    rows = (await session.execute(q.limit(limit + 1))).all()
+    return views._entries_page(rows, limit), 200
+
+
+async def _stream_entries(session, q):
+    chunk = current_app.config.get("RECORDS_STREAM_CHUNK", 1000)
+    dumps = current_app.json.dumps
+    result = await session.stream(q.execution_options(yield_per=chunk))
+    async for rows in result.partitions():
+        yield "".join(dumps(item) + "\n" for item in views._entry_items(rows)).encode()
+
+
+async def read_kinds(session):
+    uid = request.args.get("user_id", type=int)
+    raw = {}
+    if uid is not None:
+        raw["user_id"] = uid
+
+    try:
+        params = Schemas.category_query_schema.load(raw)
+    except ValidationError as e:
+        return {"error": "invalid query params", "details": e.messages}, 400
+
+    uid = params.get("user_id")
+
+    async def load():
+        return views._kinds_items(await session.execute(views._kinds_query(uid)))
+
+    etag, items = await category_cache.aget_or_load(uid, load, store=g.get("db_replica") is None)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if request.if_none_match.contains(etag):
+        return "", 304, headers
+    return items, 200, headers
+
+
+async def read_people(session):
+    try:
+        params = Schemas.user_query_schema.load(views._people_raw(request.args))
+    except ValidationError as e:
+        return {"error": "invalid query params", "details": e.messages}, 400
+
+    limit = params.get("limit", current_app.config.get("USERS_PAGE_SIZE", 100))
+    rows = (await session.execute(views._people_query(params, limit))).all()
+    etag, body = views._people_page(rows, limit)
+    headers, not_modified = views._conditional(etag)
+    if not_modified:
+        return "", 304, headers
+    return body, 200, headers
+
+
+HANDLERS = {
+    "api.read_entry": read_entry,
+    "api.query_entries": query_entries,
+    "api.read_kinds": read_kinds,
+    "api.read_people": read_people,
+}
+
+
+class AsyncApp:
+    def __init__(self, app):
+        self.app = app
+        self.wsgi = WSGIMiddleware(app, workers=app.config.get("ASYNC_WSGI_THREADS", 10))
+        url, options = Pool.async_engine_args(app)
+        self.engine = create_async_engine(url, **options)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        # Async twins of the replica engines; the sync before_request hook
+        # picks one per request (g.db_replica) for both paths.
+        router = app.extensions.get("replicas")
+        self.replica_engines = []
+        for replica in router.replicas if router is not None else ():
+            url, options = Pool.async_engine_args(app, replica.engine.url.render_as_string(hide_password=False))
+            self.replica_engines.append(create_async_engine(url, **options))
+        self.replica_sessions = [async_sessionmaker(e, expire_on_commit=False) for e in self.replica_engines]
+        if app.config.get("METRICS_ENABLED"):
+            for engine in (self.engine, *self.replica_engines):
+                Metrics.instrument(engine.sync_engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http" or scope["method"] != "GET" or not await self._handle(scope, send):
+            return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for engine in (self.engine, *self.replica_engines):
+                    await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _handle(self, scope, send):
+        # Contexts are contextvars, so each request task sees its own even
+        # though they interleave on one thread.
+        with self.app.request_context(_environ(scope)):
+            handler = HANDLERS.get(request.endpoint)
+            if handler is None:
+                return False
+
+            try:
+                rv = self.app.preprocess_request()
+                if rv is None:
+                    await _verify_jwt()
+            except Exception as e:
+                rv = self._handle_error(e)
+            if rv is not None:
+                await self._send(send, self.app.make_response(rv))
+                return True
+
+            index = g.get("db_replica")
+            sessions = self.sessions if index is None else self.replica_sessions[index]
+            async with sessions() as session:
+                try:
+                    rv = await handler(session, **request.view_args)
+                except Exception as e:
+                    rv = self._handle_error(e)
+                if isinstance(rv, tuple) and rv[0] is STREAM:
+                    response = self.app.response_class(mimetype="application/x-ndjson")
+                    await self._send(send, response, body=rv[1])
+                else:
+                    await self._send(send, self.app.make_response(rv))
+            return True
+
+    def _handle_error(self, e):
+        # What Flask does around a view: registered handlers first (HTTP and
+        # JWT errors), then handle_exception, which re-raises when
+        # PROPAGATE_EXCEPTIONS is on, exactly as on the WSGI path.
+        try:
+            return self.app.handle_user_exception(e)
+        except Exception as e:
+            return self.app.handle_exception(e)
+
+    async def _send(self, send, response, body=None):
+        response = self.app.process_response(response)
+        # Same header fix-ups as the WSGI path (e.g. no entity headers on 304).
+        headers = response.get_wsgi_headers(request.environ)
+        if body is not None:
+            headers.remove("Content-Length")
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+        })
+        if body is None:
+            data = b"".join(response.get_app_iter(request.environ))
+            await send({"type": "http.response.body", "body": data})
+            return
+        async for chunk in body:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def _verify_jwt():
+    # The user and revocation loaders answer from memory; when one would
+    # have to query instead, the verification is repeated on a thread.
+    try:
+        with Tokens.on_event_loop():
+            return verify_jwt_in_request()
+    except Tokens.WouldBlock:
+        pass
+    await asyncio.get_running_loop().run_in_executor(None, Tokens.off_loop(verify_jwt_in_request))
+
+
+def _environ(scope):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    for name, value in scope["headers"]:
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def asgi_app(app):
+    return AsyncApp(app)
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def add(self, key, value):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return False
+        self.set(key, value)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    blocking = True
+
+    def __init__(self, url, ttl=60):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(key, json.dumps(value), ex=self.ttl)
+
+    def add(self, key, value):
+        return bool(self.client.set(key, json.dumps(value), ex=self.ttl, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class CategoryCache:
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    # Entries are keyed by the owner's current generation, which invalidate()
+    # replaces. A load that started before an invalidation fills the old
+    # generation's key, which nobody reads again, instead of putting the
+    # pre-change listing back for the whole TTL.
+    @staticmethod
+    def key(owner_id):
+        return "categories:global" if owner_id is None else f"categories:user:{owner_id}"
+
+    # store=False serves a hit but keeps a miss out of the cache: a listing
+    # read from a replica may predate the write that invalidated the key.
+    def get_or_load(self, owner_id, loader, store=True):
+        key = self._versioned(owner_id)
+        cached = self._count(self.backend.get(key))
+        if cached is not None:
+            return cached
+        cached = self._entry(loader())
+        if store:
+            self.backend.set(key, cached)
+        return cached
+
+    async def aget_or_load(self, owner_id, loader, store=True):
+        # loader is a coroutine function; a blocking backend (Redis) is
+        # called from a thread so it doesn't stall the event loop.
+        call = asyncio.to_thread if self.backend.blocking else _call
+        key = await call(self._versioned, owner_id)
+        cached = self._count(await call(self.backend.get, key))
+        if cached is not None:
+            return cached
+        cached = self._entry(await loader())
+        if store:
+            await call(self.backend.set, key, cached)
+        return cached
+
+    def _versioned(self, owner_id):
+        base = self.key(owner_id)
+        generation = self.backend.get(f"{base}:gen")
+        if generation is None:
+            # Never a value used before, so an expired or evicted generation
+            # can't bring back entries written under it.
+            fresh = uuid.uuid4().hex
+            if self.backend.add(f"{base}:gen", fresh):
+                generation = fresh
+            else:
+                generation = self.backend.get(f"{base}:gen") or fresh
+        return f"{base}:{generation}"
+
+    def _count(self, cached):
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return cached
+
+    @staticmethod
+    def _entry(items):
+        raw = json.dumps(items, sort_keys=True, separators=(",", ":")).encode()
+        return [hashlib.sha1(raw).hexdigest(), items]
+
+    def invalidate(self, owner_id):
+        self.backend.set(f"{self.key(owner_id)}:gen", uuid.uuid4().hex)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+async def _call(fn, *args):
+    return fn(*args)
+
+
+category_cache = CategoryCache()
+
+
+def configure(app):
+    ttl = app.config.get("CATEGORY_CACHE_TTL", 60)
+    url = app.config.get("CATEGORY_CACHE_URL")
+    if url:
+        category_cache.backend = RedisBackend(url, ttl=ttl)
+    else:
+        category_cache.backend = MemoryBackend(app.config.get("CATEGORY_CACHE_SIZE", 1024), ttl=ttl)
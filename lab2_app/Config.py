@@ -1,20 +1,105 @@
 import os
 
 PROPAGATE_EXCEPTIONS = True
-FLASK_DEBUG = True
+SERVER_MODE = os.getenv("SERVER_MODE", "development")
+FLASK_DEBUG = os.getenv("FLASK_DEBUG", "0" if SERVER_MODE == "production" else "1") == "1"
 
 if "DATABASE_URL" in os.environ:
     uri = os.environ["DATABASE_URL"]
-else:
+elif "POSTGRES_USER" in os.environ:
     uri = (
         f"postgresql://{os.environ['POSTGRES_USER']}:{os.environ['POSTGRES_PASSWORD']}"
         f"@{os.environ['POSTGRES_HOST']}:{os.environ.get('POSTGRES_PORT', '5432')}/"
         f"{os.environ['POSTGRES_DB']}"
     )
+else:
+    # Left for create_app(config) to supply.
+    uri = None
 
 SQLALCHEMY_DATABASE_URI = uri
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_POOLER_MODE = os.getenv("DB_POOLER_MODE", "0") == "1"
+
+# SERVER_MODE=async: the async engine's URL (default: derived from the one
+# above with the asyncpg / aiosqlite driver) and the thread pool that runs
+# the Flask app for endpoints without an async path.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+ASYNC_WSGI_THREADS = int(os.getenv("ASYNC_WSGI_THREADS", os.getenv("WEB_THREADS", "10")))
+
+# Read replicas (comma-separated URLs): plain SELECTs of GET requests go to
+# a healthy replica at most REPLICA_MAX_LAG_SECONDS behind, everything else
+# to the primary. A client that wrote gets the primary's WAL position back
+# (db_position cookie / X-DB-Position header) and is kept off replicas that
+# haven't replayed it. Without WAL positions (a SQLite file copy as a local
+# stand-in) it reads from the primary for REPLICA_STICKY_SECONDS instead.
+DATABASE_REPLICA_URLS = tuple(u for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u)
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "0.5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_COOKIE_MAX_AGE = int(os.getenv("REPLICA_COOKIE_MAX_AGE", "300"))
+
+MIGRATIONS_ENABLED = os.getenv("MIGRATIONS_ENABLED", "1") == "1"
+OPENAPI_ENABLED = os.getenv("OPENAPI_ENABLED", "1") == "1"
+
+MONEY_CURRENCY = os.getenv("MONEY_CURRENCY", "UAH")
+
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+
+USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", "100"))
+RECORDS_PAGE_SIZE = int(os.getenv("RECORDS_PAGE_SIZE", "100"))
+RECORDS_STREAM_CHUNK = int(os.getenv("RECORDS_STREAM_CHUNK", "1000"))
+RECORDS_BULK_CHUNK = int(os.getenv("RECORDS_BULK_CHUNK", "5000"))
+
+# DELETE_MODE=background: DELETE /user and /category hide the entity at once
+# and a per-process worker thread (DELETION_WORKER=0 leaves it to
+# "flask purge_deletions") removes its records in throttled batches.
+DELETE_MODE = os.getenv("DELETE_MODE", "sync")
+DELETION_WORKER = os.getenv("DELETION_WORKER", "1") == "1"
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", "5000"))
+DELETION_PAUSE_MS = float(os.getenv("DELETION_PAUSE_MS", "100"))
+DELETION_POLL_SECONDS = float(os.getenv("DELETION_POLL_SECONDS", "5"))
+DELETION_STALE_SECONDS = int(os.getenv("DELETION_STALE_SECONDS", "60"))
+# A failing purge is retried after DELETION_RETRY_SECONDS, doubling up to an
+# hour; after DELETION_MAX_ATTEMPTS it is left with status "failed".
+DELETION_MAX_ATTEMPTS = int(os.getenv("DELETION_MAX_ATTEMPTS", "5"))
+DELETION_RETRY_SECONDS = float(os.getenv("DELETION_RETRY_SECONDS", "30"))
+
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Logins verifying at once per worker process. Keep it below WEB_THREADS so a
+# login storm can't take every request thread; the rest get 503 + Retry-After
+# after waiting PASSWORD_VERIFY_WAIT seconds for a slot.
+PASSWORD_VERIFY_SLOTS = int(os.getenv(
+    "PASSWORD_VERIFY_SLOTS", str(max(1, int(os.getenv("WEB_THREADS", "4")) // 2))))
+PASSWORD_VERIFY_WAIT = float(os.getenv("PASSWORD_VERIFY_WAIT", "0.05"))
+
+# Without CATEGORY_CACHE_URL each worker process keeps its own copy, and a
+# write only invalidates the copy of the worker that served it: the others
+# can list stale categories for up to CATEGORY_CACHE_TTL seconds. With more
+# than one worker (WEB_WORKERS), point CATEGORY_CACHE_URL at Redis
+# (redis://host:6379/0) so every worker shares one cache.
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", "1024"))
+CATEGORY_CACHE_TTL = int(os.getenv("CATEGORY_CACHE_TTL", "60"))
+CATEGORY_CACHE_URL = os.getenv("CATEGORY_CACHE_URL")
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_SLOW_QUERY_MS = float(os.getenv("METRICS_SLOW_QUERY_MS", "200"))
+METRICS_EXPLAIN = os.getenv("METRICS_EXPLAIN", "1") == "1"
+METRICS_N_PLUS_ONE = int(os.getenv("METRICS_N_PLUS_ONE", "10"))
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+PROFILE_ENDPOINTS = tuple(e for e in os.getenv("PROFILE_ENDPOINTS", "").split(",") if e)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/lab2_profiles")
+# Outside PROFILE_ENDPOINTS a request is profiled only when its X-Profile
+# header equals this secret; unset, the header is ignored.
+PROFILE_SECRET = os.getenv("PROFILE_SECRET")
+
 API_TITLE = "Finance REST API"
 API_VERSION = "v1"
 
@@ -23,6 +108,13 @@ OPENAPI_URL_PREFIX = "/"
 OPENAPI_SWAGGER_UI_PATH = "/swagger-ui"
 OPENAPI_SWAGGER_UI_URL = "https://cdn.jsdelivr.net/npm/swagger-ui-dist/"
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", "10000"))
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", "60"))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.01"))
+REVOCATION_EXACT_CACHE_SIZE = int(os.getenv("REVOCATION_EXACT_CACHE_SIZE", "10000"))
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "1"))
+REVOCATION_SYNC_OVERLAP = int(os.getenv("REVOCATION_SYNC_OVERLAP", "60"))
 
 
 
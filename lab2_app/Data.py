@@ -1,7 +1,19 @@
-from datetime import datetime
+import io
+import random
+from datetime import datetime, time, timedelta, timezone
+from itertools import accumulate
+
+from sqlalchemy import func, insert, select
+
 from . import db
 from .Models import User, Category, Record
-from passlib.hash import pbkdf2_sha256
+from .Money import to_minor
+from .Rollup import add_records, rebuild
+from .Passwords import hash_password
+
+LOAD_USER_PREFIX = "load_user_"
+LOAD_CATEGORY_PREFIX = "load_category_"
+LOAD_PASSWORD = "12345"
 
 def test_data(reset: bool = False):
     if reset:
@@ -20,20 +32,121 @@ def test_data(reset: bool = False):
         (6,6,"2025-10-27 18:20:00",9999.99),
     ]
 
-    db.session.add_all([
-        User(name=n, password=pbkdf2_sha256.hash("12345"))
-        for n in users
-    ])
+    password = hash_password(LOAD_PASSWORD)
+    db.session.add_all([User(name=n, password=password) for n in users])
     db.session.commit()
 
     db.session.add_all([Category(name=n) for n in cats])
     db.session.commit()
 
-    for uid, cid, dt, amt in demo:
-        db.session.add(Record(
-            user_id=uid,
-            category_id=cid,
-            datetime=datetime.fromisoformat(dt),
-            amount=float(amt),
-        ))
+    rows = [
+        {
+            "user_id": uid,
+            "category_id": cid,
+            "datetime": datetime.fromisoformat(dt),
+            "amount_minor": to_minor(amt),
+        }
+        for uid, cid, dt, amt in demo
+    ]
+    db.session.add_all([Record(**row) for row in rows])
+    add_records(rows)
+    db.session.commit()
+
+
+def synthetic_data(users=10_000, categories=1_000, records=50_000_000, since=None, days=365,
+                   skew=1.1, seed=42, chunk=100_000, report=None):
+    # Every chunk is drawn from its own RNG seeded by (seed, chunk number) and
+    # committed on its own, so a rerun with the same parameters counts what is
+    # already there and continues with the next chunk instead of duplicating.
+    since = since or datetime.now(timezone.utc).date() - timedelta(days=days)
+    start = datetime.combine(since, time.min, tzinfo=timezone.utc)
+    span = days * 86400
+
+    password = hash_password(LOAD_PASSWORD)
+    user_ids = _ensure_rows(
+        User, [f"{LOAD_USER_PREFIX}{i:06d}" for i in range(users)],
+        lambda name: {"name": name, "password": password},
+    )
+    category_ids = _ensure_rows(
+        Category, [f"{LOAD_CATEGORY_PREFIX}{i:05d}" for i in range(categories)],
+        lambda name: {"name": name, "owner_id": None},
+        Category.owner_id.is_(None),
+    )
+    _ensure_partitions(since, days)
+
+    done = db.session.execute(
+        select(func.count())
+        .select_from(Record)
+        .join(User, User.id == Record.user_id)
+        .where(User.name.startswith(LOAD_USER_PREFIX, autoescape=True))
+    ).scalar()
+    if done % chunk and done < records:
+        raise ValueError(f"{done} synthetic records exist, which is not a multiple of chunk={chunk}; "
+                         "resume with the chunk size used originally")
+
+    # Zipf-like popularity: rank r is picked with weight 1 / r**skew, so a few
+    # users and categories carry most of the records, as in production.
+    user_weights = list(accumulate(1 / (r ** skew) for r in range(1, users + 1)))
+    category_weights = list(accumulate(1 / (r ** skew) for r in range(1, categories + 1)))
+    copy = db.engine.dialect.name == "postgresql"
+
+    number = done // chunk
+    while done < records:
+        rng = random.Random(f"{seed}:{number}")
+        size = min(chunk, records - done)
+        uids = rng.choices(user_ids, cum_weights=user_weights, k=size)
+        cids = rng.choices(category_ids, cum_weights=category_weights, k=size)
+        rows = [
+            (uid, cid, start + timedelta(seconds=rng.randrange(span)), int(rng.lognormvariate(7.5, 1.2)) + 1)
+            for uid, cid in zip(uids, cids)
+        ]
+        if copy:
+            _copy_records(rows)
+        else:
+            db.session.execute(insert(Record), [
+                {"user_id": uid, "category_id": cid, "datetime": dt, "amount_minor": amount}
+                for uid, cid, dt, amount in rows
+            ])
+        db.session.commit()
+        done += size
+        number += 1
+        if report:
+            report(done, records)
+
+    rebuild()
+    return done
+
+
+def _ensure_rows(model, names, values, *where):
+    scope = select(model.name, model.id).where(model.name.in_(names), *where)
+    existing = dict(db.session.execute(scope).all())
+    missing = [values(name) for name in names if name not in existing]
+    for i in range(0, len(missing), 5000):
+        db.session.execute(insert(model), missing[i:i + 5000])
     db.session.commit()
+    ids = dict(db.session.execute(scope).all()) if missing else existing
+    return [ids[name] for name in names]
+
+
+def _ensure_partitions(since, days):
+    from .Partitions import ensure_partitions, is_partitioned, month_start
+    if not is_partitioned():
+        return
+    current = month_start(datetime.now(timezone.utc).date())
+    last = since + timedelta(days=days)
+    ahead = max(3, (last.year - current.year) * 12 + last.month - current.month)
+    ensure_partitions(since, ahead)
+
+
+def _copy_records(rows):
+    buf = io.StringIO()
+    buf.writelines(
+        f"{uid}\t{cid}\t{dt.isoformat()}\t{amount}\n"
+        for uid, cid, dt, amount in rows
+    )
+    buf.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert("COPY records (user_id, category_id, datetime, amount_minor) FROM STDIN", buf)
+    finally:
+        cursor.close()
@@ -0,0 +1,225 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import delete, func, or_, select, tuple_, update
+
+from . import db
+from .Models import Category, DailyTotal, Deletion, Record, User
+
+log = logging.getLogger(__name__)
+
+MODES = ("sync", "background")
+MAX_RETRY_SECONDS = 3600
+
+# kind -> (model, records column, rollup column)
+KINDS = {
+    "user": (User, Record.user_id, DailyTotal.user_id),
+    "category": (Category, Record.category_id, DailyTotal.category_id),
+}
+
+
+def background():
+    return current_app.config.get("DELETE_MODE", "sync") == "background"
+
+
+def enqueue(kind, target):
+    # Marks the entity deleted (reads stop seeing it at commit) and queues
+    # the purge, both in the caller's transaction.
+    now = datetime.now(timezone.utc)
+    target.deleted_at = now
+    if kind == "user":
+        # Owned categories go with the user; hiding them hides their records.
+        db.session.execute(
+            update(Category)
+            .where(Category.owner_id == target.id, Category.deleted_at.is_(None))
+            .values(deleted_at=now)
+        )
+    job = Deletion(kind=kind, target_id=target.id, status="pending")
+    db.session.add(job)
+    return job
+
+
+def status(job):
+    if job.status == "done":
+        progress = 1.0
+    elif job.total:
+        progress = round(min(job.deleted / job.total, 1.0), 4)
+    else:
+        progress = None
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "target_id": job.target_id,
+        "status": job.status,
+        "total": job.total,
+        "deleted": job.deleted,
+        "progress": progress,
+        "attempts": job.attempts,
+        "retry_at": job.retry_at,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def claim(stale_seconds, max_attempts):
+    # A running job whose heartbeat (updated_at) went stale belongs to a
+    # worker that died; the purge is idempotent, so it is simply resumed.
+    # Every claim is an attempt, so a job that keeps killing its worker
+    # fails too instead of being picked up forever.
+    while True:
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=stale_seconds)
+        job = db.session.execute(
+            select(Deletion)
+            .where(or_(
+                (Deletion.status == "pending") & (or_(Deletion.retry_at.is_(None), Deletion.retry_at <= now)),
+                (Deletion.status == "running") & (Deletion.updated_at < stale),
+            ))
+            .order_by(Deletion.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if job is None:
+            db.session.rollback()
+            return None
+        if job.attempts >= max_attempts:
+            job.status = "failed"
+            job.error = job.error or "worker stopped during every attempt"
+            db.session.commit()
+            continue
+        job.status = "running"
+        job.attempts = Deletion.attempts + 1
+        job.retry_at = None
+        db.session.commit()
+        return job
+
+
+def purge(job, batch_size, pause):
+    model, record_col, total_col = KINDS[job.kind]
+    if job.total is None:
+        # The rollup already has per-day counts; no count(*) over records.
+        job.total = db.session.execute(
+            select(func.coalesce(func.sum(DailyTotal.count), 0)).where(total_col == job.target_id)
+        ).scalar()
+        db.session.commit()
+
+    # Each batch is its own short transaction: row locks and WAL are bounded
+    # by batch_size, and the pause leaves room for replication and vacuum.
+    batch = select(Record.id, Record.datetime).where(record_col == job.target_id).limit(batch_size)
+    while True:
+        deleted = db.session.execute(
+            delete(Record).where(tuple_(Record.id, Record.datetime).in_(batch)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        # In SQL: a worker that resumes a stale job may overlap with the one
+        # it replaced, and each must add only the rows it deleted.
+        db.session.execute(
+            update(Deletion).where(Deletion.id == job.id).values(deleted=Deletion.deleted + deleted),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+        if deleted < batch_size:
+            break
+        time.sleep(pause)
+
+    # What is left is small: rollup rows, a user's own categories (their
+    # records were the user's) and the entity row. Deleted explicitly rather
+    # than by ON DELETE CASCADE, which SQLite doesn't enforce by default.
+    db.session.execute(delete(DailyTotal).where(total_col == job.target_id))
+    if job.kind == "user":
+        db.session.execute(delete(Category).where(Category.owner_id == job.target_id))
+    db.session.execute(delete(model).where(model.id == job.target_id))
+    job.status = "done"
+    job.error = None
+    job.finished_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+
+def run_pending(batch_size, pause, stale_seconds, max_attempts=5, retry_seconds=30):
+    done = 0
+    while True:
+        job = claim(stale_seconds, max_attempts)
+        if job is None:
+            return done
+        try:
+            purge(job, batch_size, pause)
+        except Exception as e:
+            db.session.rollback()
+            log.exception("deletion %s of %s %s failed", job.id, job.kind, job.target_id)
+            _retry_later(job, e, max_attempts, retry_seconds)
+            continue
+        done += 1
+
+
+def _retry_later(job, error, max_attempts, retry_seconds):
+    # Exponential backoff between attempts; after max_attempts the job stays
+    # failed (its entity hidden) until an operator looks at the error.
+    job.error = str(error)[:1000]
+    if job.attempts >= max_attempts:
+        job.status = "failed"
+    else:
+        job.status = "pending"
+        delay = min(retry_seconds * 2 ** (job.attempts - 1), MAX_RETRY_SECONDS)
+        job.retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    db.session.commit()
+
+
+class Worker:
+    # One daemon thread per process, started by the first request so that
+    # gunicorn's preload fork doesn't leave it behind in the master. It wakes
+    # on enqueue in this process and otherwise polls, which picks up jobs
+    # queued by other processes and ones a dead worker left running.
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config.get("DELETION_BATCH_SIZE", 5000)
+        self.pause = app.config.get("DELETION_PAUSE_MS", 100) / 1000
+        self.poll = app.config.get("DELETION_POLL_SECONDS", 5)
+        self.stale = app.config.get("DELETION_STALE_SECONDS", 60)
+        self.max_attempts = app.config.get("DELETION_MAX_ATTEMPTS", 5)
+        self.retry = app.config.get("DELETION_RETRY_SECONDS", 30)
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, name="deletions", daemon=True).start()
+                self._pid = os.getpid()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    run_pending(self.batch_size, self.pause, self.stale, self.max_attempts, self.retry)
+                except Exception:
+                    log.exception("deletion worker failed")
+            self._wake.wait(self.poll)
+            self._wake.clear()
+
+
+def wake():
+    worker = current_app.extensions.get("deletion_worker")
+    if worker is not None:
+        worker.wake()
+
+
+def configure(app):
+    mode = app.config.get("DELETE_MODE", "sync")
+    if mode not in MODES:
+        raise ValueError(f"unknown DELETE_MODE {mode!r}, expected one of {', '.join(MODES)}")
+    if mode != "background" or not app.config.get("DELETION_WORKER", True):
+        return
+    worker = app.extensions["deletion_worker"] = Worker(app)
+    app.before_request(worker.ensure_started)
@@ -0,0 +1,92 @@
+from sqlalchemy import text
+from sqlalchemy.sql.elements import UnaryExpression
+
+from . import db
+
+USAGE_SQL = text("""
+WITH RECURSIVE tree AS (
+    SELECT c.oid AS root, c.oid AS oid
+    FROM pg_class c
+    JOIN pg_index i ON i.indexrelid = c.oid
+    JOIN pg_class t ON t.oid = i.indrelid
+    WHERE c.relnamespace = 'public'::regnamespace AND NOT t.relispartition
+    UNION ALL
+    SELECT tree.root, inh.inhrelid
+    FROM tree JOIN pg_inherits inh ON inh.inhparent = tree.oid
+)
+SELECT r.relname AS name,
+       coalesce(sum(s.idx_scan), 0) AS scans,
+       coalesce(sum(pg_relation_size(tree.oid)), 0) AS size
+FROM tree
+JOIN pg_class r ON r.oid = tree.root
+LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = tree.oid
+GROUP BY r.relname
+""")
+
+
+def _column_names(expressions, ops=None):
+    # An operator class (e.g. text_pattern_ops) serves different queries than
+    # the default one, so it is part of the key for redundancy checks.
+    ops = ops or {}
+    names = []
+    for expr in expressions:
+        if isinstance(expr, UnaryExpression):
+            expr = expr.element
+        name = getattr(expr, "name", str(expr))
+        names.append(f"{name} {ops[name]}" if name in ops else name)
+    return tuple(names)
+
+
+def declared_indexes(metadata):
+    found = {}
+    for table in metadata.sorted_tables:
+        entries = []
+        if table.primary_key.columns:
+            entries.append((f"{table.name}_pkey", tuple(c.name for c in table.primary_key.columns), True))
+        for constraint in table.constraints:
+            if constraint.__class__.__name__ == "UniqueConstraint":
+                entries.append((constraint.name, tuple(c.name for c in constraint.columns), True))
+        for index in table.indexes:
+            partial = index.dialect_options["postgresql"].get("where") is not None
+            ops = index.dialect_options["postgresql"].get("ops")
+            entries.append((index.name, _column_names(index.expressions, ops), index.unique and not partial))
+        found[table.name] = entries
+    return found
+
+
+def redundant_indexes(entries):
+    """Non-unique indexes whose key columns are a leading prefix of another index."""
+    redundant = []
+    for name, columns, unique in entries:
+        if unique:
+            continue
+        for other, other_columns, _ in entries:
+            if other != name and other_columns[:len(columns)] == columns:
+                redundant.append((name, other))
+                break
+    return redundant
+
+
+def usage():
+    if db.engine.dialect.name != "postgresql":
+        return {}
+    return {row.name: (row.scans, row.size) for row in db.session.execute(USAGE_SQL)}
+
+
+def report(metadata):
+    stats = usage()
+    lines = []
+    for table, entries in declared_indexes(metadata).items():
+        lines.append(f"{table}:")
+        for name, columns, unique in entries:
+            scans, size = stats.get(name, (None, None))
+            usage_text = "" if scans is None else f"  scans={scans} size={size // 1024}kB"
+            flag = " unique" if unique else ""
+            lines.append(f"  {name} ({', '.join(columns)}){flag}{usage_text}")
+        for name, other in redundant_indexes(entries):
+            lines.append(f"  REDUNDANT {name}: prefix of {other}")
+    if stats:
+        declared = {name for entries in declared_indexes(metadata).values() for name, _, _ in entries}
+        for name in sorted(set(stats) - declared):
+            lines.append(f"UNDECLARED {name} scans={stats[name][0]}")
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+HOURS = tuple(f" {h:02d}:" for h in range(24))
+MINUTES_SECONDS = tuple(f"{m:02d}:{s:02d} GMT" for m in range(60) for s in range(60))
+
+_day_prefixes = {}
+
+
+def http_date(value):
+    # Same text as werkzeug.http.http_date, which Flask's provider uses for
+    # dates, but built from lookup tables: listings hit it once per row.
+    if isinstance(value, datetime):
+        if value.tzinfo is not None and value.utcoffset():
+            value = value.astimezone(timezone.utc)
+        hour, rest = HOURS[value.hour], MINUTES_SECONDS[value.minute * 60 + value.second]
+    else:
+        hour, rest = HOURS[0], MINUTES_SECONDS[0]
+    ordinal = value.toordinal()
+    prefix = _day_prefixes.get(ordinal)
+    if prefix is None:
+        if len(_day_prefixes) >= 4096:
+            _day_prefixes.clear()
+        prefix = _day_prefixes[ordinal] = (
+            f"{DAYS[value.weekday()]}, {value.day:02d} {MONTHS[value.month - 1]} {value.year:04d}"
+        )
+    return prefix + hour + rest
+
+
+def _default(o):
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    # Drop-in for Flask's provider: the same output types (HTTP dates,
+    # Decimal as string, sorted keys, indented in debug), encoded by orjson
+    # straight to bytes.
+    def __init__(self, app):
+        import orjson
+
+        super().__init__(app)
+        self._orjson = orjson
+
+    def _options(self, compact=None):
+        orjson = self._orjson
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if compact is None:
+            compact = self.compact if self.compact is not None else not self._app.debug
+        if not compact:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return self._orjson.dumps(obj, default=_default, option=self._options(True)).decode()
+
+    def loads(self, s, **kwargs):
+        return self._orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self._orjson.dumps(obj, default=_default, option=self._options())
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+PROVIDERS = {
+    "flask": DefaultJSONProvider,
+    "orjson": OrjsonProvider,
+}
+
+
+def configure(app):
+    name = app.config.get("JSON_PROVIDER", "orjson")
+    if name not in PROVIDERS:
+        raise ValueError(f"unknown JSON_PROVIDER {name!r}, expected one of {', '.join(PROVIDERS)}")
+    app.json = PROVIDERS[name](app)
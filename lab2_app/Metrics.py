@@ -0,0 +1,287 @@
+import hmac
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from . import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Total:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, count, total) in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, counts):
+                    le = _labels(self.labels + ("le",), labels + (repr(float(bound)),))
+                    lines.append(f"{self.name}_bucket{le} {n}")
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), labels + ('+Inf',))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labels, labels)} {count}")
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+requests_total = Total(
+    "http_requests_total", "HTTP requests by endpoint, method and status.", ("endpoint", "method", "status"))
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Time to build the response.", ("endpoint", "method"), LATENCY_BUCKETS)
+statements_per_request = Histogram(
+    "db_statements_per_request", "SQL statements executed per request.", ("endpoint",), STATEMENT_BUCKETS)
+db_seconds_per_request = Histogram(
+    "db_seconds_per_request", "Time spent in SQL per request.", ("endpoint",), LATENCY_BUCKETS)
+slow_queries_total = Total(
+    "db_slow_queries_total", "Statements slower than METRICS_SLOW_QUERY_MS.", ("endpoint",))
+n_plus_one_total = Total(
+    "db_n_plus_one_total", "Requests that repeated one SELECT at least METRICS_N_PLUS_ONE times.", ("endpoint",))
+
+METRICS = (
+    requests_total,
+    request_seconds,
+    statements_per_request,
+    db_seconds_per_request,
+    slow_queries_total,
+    n_plus_one_total,
+)
+
+POOL_COUNTERS = {"checkouts", "timeouts", "wait_seconds_total"}
+
+
+def configure(app):
+    if not app.config.get("METRICS_ENABLED"):
+        return
+    app.before_request(_start_request)
+    app.after_request(_tag_response)
+    app.teardown_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint)
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument(engine)
+
+
+def instrument(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _endpoint():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def _start_request():
+    g.metrics = {"start": time.perf_counter(), "statements": 0, "db_seconds": 0.0, "shapes": Counter()}
+    config = current_app.config
+    if config.get("PROFILE_ENABLED") and (
+        _endpoint() in config.get("PROFILE_ENDPOINTS", ()) or _profile_requested(config.get("PROFILE_SECRET"))
+    ):
+        g.metrics["sampler"] = Sampler(threading.get_ident(), config.get("PROFILE_INTERVAL_MS", 5) / 1000)
+        g.metrics["sampler"].start()
+
+
+def _profile_requested(secret):
+    # Each profiled request costs a sampler thread and a file on disk, so an
+    # ad hoc one needs the operator's secret, not just the header.
+    given = request.headers.get("X-Profile")
+    return bool(secret) and given is not None and hmac.compare_digest(given.encode(), secret.encode())
+
+
+def _tag_response(response):
+    # Only what has to be on the response; the accounting is in teardown,
+    # which also runs for requests whose view raised.
+    state = g.get("metrics")
+    if state is None:
+        return response
+    state["status"] = response.status_code
+    sampler = state.get("sampler")
+    if sampler is not None:
+        path = sampler.stop(_endpoint())
+        # The name within PROFILE_DIR only; the server's paths stay private.
+        response.headers["X-Profile-File"] = os.path.basename(path)
+    return response
+
+
+def _finish_request(exc):
+    state = g.pop("metrics", None)
+    if state is None:
+        return
+    sampler = state.get("sampler")
+    if sampler is not None:
+        # A view that raised skipped after_request; its thread stops here.
+        sampler.stop(_endpoint())
+    elapsed = time.perf_counter() - state["start"]
+    endpoint = _endpoint()
+    status = 500 if exc is not None else state.get("status", 500)
+    requests_total.inc(endpoint, request.method, status)
+    request_seconds.observe(elapsed, endpoint, request.method)
+    statements_per_request.observe(state["statements"], endpoint)
+    db_seconds_per_request.observe(state["db_seconds"], endpoint)
+
+    threshold = current_app.config.get("METRICS_N_PLUS_ONE", 10)
+    repeated = [(n, sql) for sql, n in state["shapes"].items() if n >= threshold]
+    if repeated:
+        n_plus_one_total.inc(endpoint)
+        for n, sql in sorted(repeated, reverse=True):
+            current_app.logger.warning("possible N+1 in %s %s: %dx %s", request.method, endpoint, n, sql[:300])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "metrics" in g:
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and "metrics" in g):
+        return
+    starts = conn.info.get("metrics_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    state = g.metrics
+    state["statements"] += 1
+    state["db_seconds"] += elapsed
+    is_select = statement.lstrip()[:6].upper() == "SELECT"
+    if is_select:
+        state["shapes"][statement] += 1
+
+    if elapsed * 1000 >= current_app.config.get("METRICS_SLOW_QUERY_MS", 200):
+        slow_queries_total.inc(_endpoint())
+        plan = ""
+        if is_select and not executemany and current_app.config.get("METRICS_EXPLAIN", True):
+            plan = "\n" + _explain(conn, statement, parameters)
+        current_app.logger.warning("slow query (%.1f ms) in %s: %s%s", elapsed * 1000, _endpoint(), statement, plan)
+
+
+def _explain(conn, statement, parameters):
+    # A raw DBAPI cursor on the same connection: same transaction and
+    # snapshot, and it doesn't re-enter these event hooks.
+    # On Postgres a failed statement aborts the transaction, hence the savepoint.
+    postgres = conn.dialect.name == "postgresql"
+    cursor = conn.connection.cursor()
+    try:
+        if postgres:
+            cursor.execute("SAVEPOINT metrics_explain")
+        try:
+            cursor.execute(("EXPLAIN " if postgres else "EXPLAIN QUERY PLAN ") + statement, parameters)
+            plan = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception as e:
+            if postgres:
+                cursor.execute("ROLLBACK TO SAVEPOINT metrics_explain")
+            return f"EXPLAIN failed: {e}"
+        if postgres:
+            cursor.execute("RELEASE SAVEPOINT metrics_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def metrics_endpoint():
+    from . import Pool
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for key, value in Pool.status(db.engine).items():
+        kind = "counter" if key in POOL_COUNTERS else "gauge"
+        lines.append(f"# TYPE db_pool_{key} {kind}")
+        lines.append(f"db_pool_{key} {value}")
+    return "\n".join(lines) + "\n", 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+class Sampler:
+    # Polls the request thread's stack from a side thread and keeps folded
+    # stacks ("outer;inner;leaf count"), the input format of flamegraph.pl
+    # and speedscope. Costs nothing for requests that aren't sampled.
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.path = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self, endpoint):
+        if self._stop.is_set():
+            return self.path
+        self._stop.set()
+        self._thread.join()
+        directory = current_app.config.get("PROFILE_DIR", "/tmp/lab2_profiles")
+        os.makedirs(directory, exist_ok=True)
+        name = endpoint.strip("/").replace("/", "_").replace("<", "").replace(">", "") or "root"
+        fd, path = tempfile.mkstemp(prefix=f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-", suffix=".folded",
+                                    dir=directory)
+        with os.fdopen(fd, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.path = path
+        return path
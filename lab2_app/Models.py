@@ -1,4 +1,4 @@
-from sqlalchemy import text
+from sqlalchemy import func, text
 from . import db
 
 class User(db.Model):
@@ -7,6 +7,15 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), nullable=False, unique=True, index=True)
     password = db.Column(db.String(255), nullable=False)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    # Set when DELETE_MODE=background queues the user for purging.
+    deleted_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     records = db.relationship(
         "Record",
@@ -15,6 +24,20 @@ class User(db.Model):
         passive_deletes=True,
     )
 
+    __table_args__ = (
+        # LIKE 'prefix%' can only use a btree under the C collation or with
+        # the pattern operator class.
+        db.Index("idx_users_name_pattern", "name", postgresql_ops={"name": "text_pattern_ops"}),
+        db.Index(
+            "idx_users_deleted",
+            "id",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
 class Category(db.Model):
     __tablename__ = "categories"
 
@@ -24,8 +47,8 @@ class Category(db.Model):
         db.Integer,
         db.ForeignKey("users.id", ondelete="CASCADE"),
         nullable=True,
-        index=True,
     )
+    deleted_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     owner_user = db.relationship("User", passive_deletes=True)
     records = db.relationship(
@@ -43,6 +66,12 @@ class Category(db.Model):
             unique=True,
             postgresql_where=text("owner_id IS NULL"),
         ),
+        db.Index(
+            "idx_categories_deleted",
+            "id",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
     )
 
 class Record(db.Model):
@@ -53,21 +82,100 @@ class Record(db.Model):
         db.Integer,
         db.ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     category_id = db.Column(
         db.Integer,
         db.ForeignKey("categories.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
-    datetime = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
-    amount = db.Column(db.Float, nullable=False)
+    datetime = db.Column(db.DateTime(timezone=True), nullable=False)
+    amount_minor = db.Column(db.BigInteger, nullable=False)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
 
     user = db.relationship("User", back_populates="records")
     category = db.relationship("Category", back_populates="records")
 
     __table_args__ = (
         db.Index("idx_records_user_id_category_id_datetime", "user_id", "category_id", "datetime"),
-        db.CheckConstraint("amount > 0", name="ck_records_amount_gt_zero"),
+        db.Index(
+            "idx_records_user_id_datetime_id",
+            user_id,
+            datetime.desc(),
+            id.desc(),
+            postgresql_include=["category_id", "amount_minor"],
+        ),
+        db.Index(
+            "idx_records_category_id_datetime_id",
+            category_id,
+            datetime.desc(),
+            id.desc(),
+            postgresql_include=["user_id", "amount_minor"],
+        ),
+        db.CheckConstraint("amount_minor > 0", name="ck_records_amount_gt_zero"),
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+class DailyTotal(db.Model):
+    __tablename__ = "daily_totals"
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    category_id = db.Column(
+        db.Integer,
+        db.ForeignKey("categories.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    amount_sum = db.Column(db.BigInteger, nullable=False)
+    amount_min = db.Column(db.BigInteger, nullable=False)
+    amount_max = db.Column(db.BigInteger, nullable=False)
+
+class RevokedUser(db.Model):
+    __tablename__ = "revoked_users"
+
+    # No foreign key: the row outlives the user it revokes.
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+class Deletion(db.Model):
+    __tablename__ = "deletions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, server_default="pending")
+    total = db.Column(db.BigInteger, nullable=True)
+    deleted = db.Column(db.BigInteger, nullable=False, server_default="0")
+    attempts = db.Column(db.Integer, nullable=False, server_default="0")
+    retry_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Doubles as the worker's heartbeat: it is bumped by every batch commit.
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    finished_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        db.Index(
+            "idx_deletions_open",
+            "id",
+            postgresql_where=text("status IN ('pending', 'running')"),
+            sqlite_where=text("status IN ('pending', 'running')"),
+        ),
     )
@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+# ISO 4217 minor-unit exponents for the currencies we expect to see.
+SCALES = {
+    "UAH": 2,
+    "USD": 2,
+    "EUR": 2,
+    "PLN": 2,
+    "GBP": 2,
+    "JPY": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "BHD": 3,
+}
+
+MAX_MINOR = 2 ** 63 - 1
+
+_state = {"currency": "UAH", "scale": 2, "minor_digits": tuple(f"{i:02d}" for i in range(100))}
+
+
+def scale_for(currency):
+    return SCALES.get(currency.upper(), 2)
+
+
+def configure(app):
+    currency = app.config.get("MONEY_CURRENCY", "UAH")
+    _state["currency"] = currency
+    _state["scale"] = digits = scale_for(currency)
+    _state["minor_digits"] = tuple(f"{i:0{digits}d}" for i in range(10 ** digits))
+
+
+def scale():
+    return _state["scale"]
+
+
+def to_minor(value):
+    return int(Decimal(str(value)).scaleb(_state["scale"]))
+
+
+def format_minor(value):
+    value = int(value)
+    digits = _state["scale"]
+    if digits == 0:
+        return str(value)
+    # Listings call this once per row; the padded fraction comes from a table.
+    units, minor = divmod(abs(value), 10 ** digits)
+    text = f"{units}.{_state['minor_digits'][minor]}"
+    return "-" + text if value < 0 else text
+
+
+def average_minor(total, count):
+    total = int(total)
+    # Round half away from zero on integer minor units.
+    if total >= 0:
+        return (2 * total + count) // (2 * count)
+    return -((-2 * total + count) // (2 * count))
@@ -0,0 +1,126 @@
+"""Lock-friendly helpers for Alembic migrations on large tables.
+
+Everything here runs in an autocommit block: CREATE INDEX CONCURRENTLY
+cannot run inside a transaction, and backfills commit per batch so no
+statement holds locks on the whole table.
+"""
+import hashlib
+import time
+
+import sqlalchemy as sa
+from alembic import op
+
+LOCK_TIMEOUT = "5s"
+INDEX_ATTEMPTS = 5
+INDEX_RETRY_PAUSE = 2.0
+
+
+def _is_partitioned(bind, table):
+    return bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table)"
+    ), {"table": table}).scalar()
+
+
+def _partitions(bind, table):
+    return bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table}).scalars().all()
+
+
+def _index_valid(bind, name):
+    # None when there is no such index.
+    return bind.execute(sa.text(
+        "SELECT i.indisvalid FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+    ), {"name": name}).scalar()
+
+
+def _child_index_name(partition, name):
+    # Identifiers are cut at 63 bytes; a plain cut can give two partitions
+    # the same index name, so long ones keep a hash of the full name.
+    full = f"{partition}_{name}"
+    if len(full) <= 63:
+        return full
+    return f"{full[:54]}_{hashlib.blake2b(full.encode(), digest_size=4).hexdigest()}"
+
+
+def _build_concurrently(bind, kind, name, target, tail):
+    # A concurrent build that fails (lock_timeout, a duplicate for UNIQUE)
+    # leaves an INVALID index behind: maintained on every write, never used
+    # for reads, and enough to make IF NOT EXISTS skip it. So the name is
+    # checked in pg_index, an invalid one dropped and the build retried.
+    for attempt in range(1, INDEX_ATTEMPTS + 1):
+        valid = _index_valid(bind, name)
+        if valid:
+            return
+        if valid is not None:
+            bind.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        try:
+            bind.execute(sa.text(f"CREATE {kind} CONCURRENTLY {name} ON {target} {tail}"))
+            return
+        except sa.exc.OperationalError as e:
+            # 55P03 lock_not_available: lock_timeout hit; anything else is real.
+            if getattr(e.orig, "pgcode", None) != "55P03" or attempt == INDEX_ATTEMPTS:
+                raise
+        time.sleep(INDEX_RETRY_PAUSE * attempt)
+
+
+def create_index_concurrently(name, table, columns, include=None, unique=False, where=None):
+    """Build an index without blocking writes.
+
+    ``columns`` is the SQL column list, e.g. ``"user_id, datetime DESC"``.
+    Partitioned tables don't support CONCURRENTLY on the parent, so the
+    parent index is created ON ONLY (instant, invalid), each partition is
+    indexed concurrently and attached, which makes the parent valid.
+    Reruns rebuild any index a failed run left INVALID.
+    """
+    bind = op.get_bind()
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    tail = f"({columns})" + (f" INCLUDE ({', '.join(include)})" if include else "")
+    if where:
+        tail += f" WHERE {where}"
+    with op.get_context().autocommit_block():
+        bind.execute(sa.text(f"SET lock_timeout = '{LOCK_TIMEOUT}'"))
+        if not _is_partitioned(bind, table):
+            _build_concurrently(bind, kind, name, table, tail)
+        else:
+            bind.execute(sa.text(f"CREATE {kind} IF NOT EXISTS {name} ON ONLY {table} {tail}"))
+            for partition in _partitions(bind, table):
+                child = _child_index_name(partition, name)
+                _build_concurrently(bind, kind, child, partition, tail)
+                bind.execute(sa.text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
+        bind.execute(sa.text("RESET lock_timeout"))
+
+
+def drop_index_concurrently(name, table):
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        bind.execute(sa.text(f"SET lock_timeout = '{LOCK_TIMEOUT}'"))
+        if _is_partitioned(bind, table):
+            # Not supported concurrently on partitioned indexes; the lock
+            # timeout keeps the brief ACCESS EXCLUSIVE from queueing readers.
+            bind.execute(sa.text(f"DROP INDEX IF EXISTS {name}"))
+        else:
+            bind.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        bind.execute(sa.text("RESET lock_timeout"))
+
+
+def backfill(table, assignments, where="TRUE", params=None, batch_size=50000, pause=0.0):
+    """Run ``UPDATE table SET assignments WHERE where`` in committed id ranges."""
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).one()
+    if low is None:
+        return
+    statement = sa.text(
+        f"UPDATE {table} SET {assignments} "
+        f"WHERE id >= :_start AND id < :_stop AND ({where})"
+    )
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, batch_size):
+            bind.execute(statement, {**(params or {}), "_start": start, "_stop": start + batch_size})
+            if pause:
+                time.sleep(pause)
@@ -0,0 +1,94 @@
+from datetime import date, datetime, time, timezone
+
+from sqlalchemy import text
+
+from . import db
+
+DEFAULT_PARTITION = "records_default"
+DETACH_LOCK_TIMEOUT = "5s"
+COLUMNS = "id, user_id, category_id, datetime, amount_minor, version, updated_at"
+
+
+def month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def add_months(month, n):
+    years, index = divmod(month.month - 1 + n, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def parse_month(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def partition_name(month):
+    return f"records_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned():
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return db.session.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'records')"
+    )).scalar()
+
+
+def ensure_partitions(since=None, ahead=3):
+    # Rows outside every month land in records_default, so inserts never
+    # fail on a missing month. A month created later takes its rows over
+    # from there; run this monthly (cron) to keep the default empty.
+    current = month_start(datetime.now(timezone.utc).date())
+    month = month_start(since or current)
+    last = add_months(current, ahead)
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        if db.session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            _create_partition(name, month)
+            created.append(name)
+        month = add_months(month, 1)
+    db.session.commit()
+    return created
+
+
+def _create_partition(name, month):
+    bounds = (
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+    params = {"start": datetime.combine(month, time(), timezone.utc),
+              "stop": datetime.combine(add_months(month, 1), time(), timezone.utc)}
+    stranded = db.session.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE datetime >= :start AND datetime < :stop)"
+    ), params).scalar()
+    if not stranded:
+        db.session.execute(text(f"CREATE TABLE {name} PARTITION OF records {bounds}"))
+        return
+    # The new bounds may not overlap rows in the default partition, so the
+    # month is built as a plain table, filled from it, then attached.
+    db.session.execute(text(f"CREATE TABLE {name} (LIKE records INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.session.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE datetime >= :start AND datetime < :stop "
+        f"RETURNING {COLUMNS}) INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+    ), params)
+    db.session.execute(text(f"ALTER TABLE records ATTACH PARTITION {name} {bounds}"))
+
+
+def detach_partition(month):
+    # CONCURRENTLY only takes SHARE UPDATE EXCLUSIVE on the parent, so reads
+    # and writes to other months keep going. It cannot run in a transaction,
+    # nor while a default partition exists; then the plain form takes a
+    # brief ACCESS EXCLUSIVE, bounded by lock_timeout instead of queueing
+    # every query behind it.
+    name = partition_name(month_start(month))
+    db.session.close()
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+            conn.execute(text(f"ALTER TABLE records DETACH PARTITION {name} CONCURRENTLY"))
+        else:
+            conn.execute(text(f"SET lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+            conn.execute(text(f"ALTER TABLE records DETACH PARTITION {name}"))
+            conn.execute(text("RESET lock_timeout"))
+    return name
@@ -0,0 +1,46 @@
+import threading
+
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"])
+
+_settings = {"slots": 2, "wait": 0.05}
+_slots = threading.BoundedSemaphore(_settings["slots"])
+
+
+class VerifierBusy(Exception):
+    pass
+
+
+def configure(app):
+    global _slots
+    rounds = app.config.get("PASSWORD_HASH_ROUNDS", 29000)
+    pwd_context.update(
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+    )
+    _settings["slots"] = max(1, app.config.get("PASSWORD_VERIFY_SLOTS", 2))
+    _settings["wait"] = app.config.get("PASSWORD_VERIFY_WAIT", 0.05)
+    _slots = threading.BoundedSemaphore(_settings["slots"])
+
+
+def hash_password(password):
+    return pwd_context.hash(password)
+
+
+def verify_password(password, hashed):
+    # The hash runs on the request thread itself, so every login in flight
+    # holds one. Fewer slots than request threads leaves the rest for normal
+    # traffic; a login that can't get one almost at once is turned away
+    # rather than left waiting on a thread.
+    slots = _slots
+    if not slots.acquire(timeout=_settings["wait"]):
+        raise VerifierBusy()
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except ValueError:
+        # Unusable or unknown hash format.
+        return False, None
+    finally:
+        slots.release()
+
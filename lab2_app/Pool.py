@@ -0,0 +1,107 @@
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class MeteredQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.observe(time.perf_counter() - start)
+        return conn
+
+
+def configure(app):
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if not uri.startswith("postgresql"):
+        return
+    options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    options.setdefault("pool_pre_ping", app.config.get("DB_POOL_PRE_PING", True))
+    if app.config.get("DB_POOLER_MODE"):
+        # An external pooler (pgbouncer in transaction mode) owns the
+        # connections, so keep none locally and skip prepared statements.
+        options["poolclass"] = NullPool
+        if uri.startswith("postgresql+psycopg://"):
+            options.setdefault("connect_args", {})["prepare_threshold"] = None
+    else:
+        options["poolclass"] = MeteredQueuePool
+        options.setdefault("pool_size", app.config.get("DB_POOL_SIZE", 5))
+        options.setdefault("max_overflow", app.config.get("DB_MAX_OVERFLOW", 10))
+        options.setdefault("pool_timeout", app.config.get("DB_POOL_TIMEOUT", 30))
+        options.setdefault("pool_recycle", app.config.get("DB_POOL_RECYCLE", 1800))
+
+
+# URL and create_async_engine() options mirroring the sync engine's.
+def async_engine_args(app, uri=None):
+    uri = uri or app.config.get("ASYNC_DATABASE_URL") or app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), {}
+    if backend != "postgresql":
+        return url, {}
+
+    url = url.set(drivername="postgresql+asyncpg")
+    options = {"pool_pre_ping": app.config.get("DB_POOL_PRE_PING", True)}
+    if app.config.get("DB_POOLER_MODE"):
+        # pgbouncer in transaction mode: no local pool and no prepared
+        # statements, neither SQLAlchemy's cache nor asyncpg's.
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        options["poolclass"] = NullPool
+        options["connect_args"] = {"statement_cache_size": 0}
+    else:
+        options["pool_size"] = app.config.get("DB_POOL_SIZE", 5)
+        options["max_overflow"] = app.config.get("DB_MAX_OVERFLOW", 10)
+        options["pool_timeout"] = app.config.get("DB_POOL_TIMEOUT", 30)
+        options["pool_recycle"] = app.config.get("DB_POOL_RECYCLE", 1800)
+    return url, options
+
+
+def status(engine):
+    stats = pool_stats.snapshot()
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    return stats
@@ -0,0 +1,223 @@
+import itertools
+import logging
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+
+log = logging.getLogger(__name__)
+
+COOKIE = "db_position"
+HEADER = "X-DB-Position"
+READ_METHODS = frozenset(("GET", "HEAD"))
+
+# A replica answers with the position it has replayed; the primary itself
+# (a stand-in replica pointing at it) with its current one.
+REPLAY_LSN = text(
+    "SELECT (CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() "
+    "ELSE pg_current_wal_lsn() END)::text"
+)
+CURRENT_LSN = text("SELECT pg_current_wal_lsn()::text")
+
+
+def parse_lsn(value):
+    high, low = value.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def format_lsn(value):
+    return f"{value >> 32:X}/{value & 0xFFFFFFFF:X}"
+
+
+class RoutingSession(Session):
+    # Plain SELECTs of a GET/HEAD request go to the replica the router picked
+    # for it in before_request; DML, FOR UPDATE, text() and anything outside
+    # a request (CLI, worker threads) use the primary.
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            index = g.get("db_replica")
+            if (
+                index is not None
+                and not self._flushing
+                and not g.get("db_wrote")
+                and getattr(clause, "is_select", False)
+                and getattr(clause, "_for_update_arg", None) is None
+            ):
+                return current_app.extensions["replicas"].replicas[index].engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_dml(state):
+    if (state.is_insert or state.is_update or state.is_delete) and has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+class Replica:
+    def __init__(self, url, engine):
+        self.url = url
+        self.engine = engine
+        self.healthy = False
+        self.position = None
+        # Time of the latest primary sample this replica is known to have
+        # replayed; now - synced_at is its lag.
+        self.synced_at = None
+
+
+class Router:
+    # Replica positions are refreshed by a side thread every check_interval,
+    # so choosing one costs no query. Clients that wrote carry the primary's
+    # position (cookie or header) and only get replicas that replayed it;
+    # everyone else gets any healthy replica within max_lag.
+    def __init__(self, primary, replicas, check_interval=0.5, max_lag=5.0, sticky=5.0):
+        self.primary = primary
+        self.replicas = replicas
+        self.postgres = primary.dialect.name == "postgresql"
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.sticky = sticky
+        self._sample = None
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, name="replicas", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                log.exception("replica check failed")
+            time.sleep(self.check_interval)
+
+    def poll(self):
+        now = time.time()
+        primary = None
+        if self.postgres:
+            with self.primary.connect() as conn:
+                primary = parse_lsn(conn.execute(CURRENT_LSN).scalar())
+        previous, self._sample = self._sample, (now, primary)
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    if self.postgres:
+                        replica.position = parse_lsn(conn.execute(REPLAY_LSN).scalar())
+                    else:
+                        conn.execute(text("SELECT 1"))
+            except Exception as e:
+                if replica.healthy:
+                    log.warning("replica %s unavailable: %s", replica.url, e)
+                replica.healthy = False
+                continue
+            replica.healthy = True
+            if not self.postgres:
+                # No replay position to compare: assume it keeps up; reads
+                # after a write rely on the sticky window instead.
+                replica.synced_at = now
+            elif replica.position >= primary:
+                replica.synced_at = now
+            elif previous is not None and previous[1] is not None and replica.position >= previous[1]:
+                replica.synced_at = max(replica.synced_at or 0, previous[0])
+
+    def choose(self, token=None):
+        now = time.time()
+        candidates = [
+            i for i, r in enumerate(self.replicas)
+            if r.healthy and r.synced_at is not None and now - r.synced_at <= self.max_lag
+        ]
+        if candidates and token:
+            kind, _, value = token.partition(":")
+            try:
+                if kind == "lsn" and self.postgres:
+                    needed = parse_lsn(value)
+                    candidates = [i for i in candidates if self.replicas[i].position >= needed]
+                elif kind == "t" and now - float(value) < self.sticky:
+                    candidates = []
+            except ValueError:
+                pass
+        if not candidates:
+            return None
+        return candidates[next(self._turn) % len(candidates)]
+
+    def primary_position(self):
+        if self.postgres:
+            with self.primary.connect() as conn:
+                return f"lsn:{conn.execute(CURRENT_LSN).scalar()}"
+        return f"t:{time.time():.3f}"
+
+    def status(self):
+        # Served over HTTP: no URLs or driver errors, those stay in the log.
+        now = time.time()
+        return [
+            {
+                "healthy": r.healthy,
+                "lag_seconds": round(now - r.synced_at, 3) if r.synced_at is not None else None,
+                "position": format_lsn(r.position) if r.position is not None else None,
+            }
+            for r in self.replicas
+        ]
+
+
+def _route(router):
+    def before():
+        router.ensure_started()
+        if request.method in READ_METHODS:
+            g.db_replica = router.choose(request.headers.get(HEADER) or request.cookies.get(COOKIE))
+
+    return before
+
+
+def _remember_position(router, max_age):
+    def after(response):
+        if g.get("db_wrote"):
+            position = router.primary_position()
+            response.headers[HEADER] = position
+            response.set_cookie(COOKIE, position, max_age=max_age, httponly=True, samesite="Lax")
+        return response
+
+    return after
+
+
+def configure(app):
+    urls = app.config.get("DATABASE_REPLICA_URLS") or ()
+    if not urls:
+        return
+    from . import db
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    with app.app_context():
+        primary = db.engine
+    replicas = [
+        Replica(make_url(url).render_as_string(hide_password=True), create_engine(url, **options))
+        for url in urls
+    ]
+    if app.config.get("METRICS_ENABLED"):
+        from .Metrics import instrument
+        for replica in replicas:
+            instrument(replica.engine)
+
+    router = app.extensions["replicas"] = Router(
+        primary,
+        replicas,
+        app.config.get("REPLICA_CHECK_INTERVAL", 0.5),
+        app.config.get("REPLICA_MAX_LAG_SECONDS", 5.0),
+        app.config.get("REPLICA_STICKY_SECONDS", 5.0),
+    )
+    app.before_request(_route(router))
+    app.after_request(_remember_position(router, app.config.get("REPLICA_COOKIE_MAX_AGE", 300)))
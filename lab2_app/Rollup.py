@@ -0,0 +1,115 @@
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import db
+from .Models import Record, DailyTotal
+
+
+def utc_day(dt):
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.date()
+
+
+def day_expr(column):
+    if db.engine.dialect.name == "postgresql":
+        return cast(func.timezone("UTC", column), Date)
+    return func.date(column)
+
+
+def add_records(rows):
+    groups = {}
+    for row in rows:
+        key = (row["user_id"], row["category_id"], utc_day(row["datetime"]))
+        amount = row["amount_minor"]
+        if key in groups:
+            count, total, low, high = groups[key]
+            groups[key] = (count + 1, total + amount, min(low, amount), max(high, amount))
+        else:
+            groups[key] = (1, amount, amount, amount)
+    if not groups:
+        return
+
+    if db.engine.dialect.name == "postgresql":
+        stmt, least, greatest = postgresql.insert(DailyTotal), func.least, func.greatest
+    else:
+        stmt, least, greatest = sqlite.insert(DailyTotal), func.min, func.max
+    stmt = stmt.values([
+        {
+            "user_id": uid,
+            "category_id": cid,
+            "day": day,
+            "count": count,
+            "amount_sum": total,
+            "amount_min": low,
+            "amount_max": high,
+        }
+        for (uid, cid, day), (count, total, low, high) in groups.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyTotal.user_id, DailyTotal.category_id, DailyTotal.day],
+        set_={
+            "count": DailyTotal.count + stmt.excluded.count,
+            "amount_sum": DailyTotal.amount_sum + stmt.excluded.amount_sum,
+            "amount_min": least(DailyTotal.amount_min, stmt.excluded.amount_min),
+            "amount_max": greatest(DailyTotal.amount_max, stmt.excluded.amount_max),
+        },
+    )
+    db.session.execute(stmt)
+
+
+def refresh_day(user_id, category_id, day):
+    key = (
+        (DailyTotal.user_id == user_id)
+        & (DailyTotal.category_id == category_id)
+        & (DailyTotal.day == day)
+    )
+    # Lock the rollup row first so concurrent inserts into the same day
+    # either land before the recount or increment on top of it.
+    total = db.session.execute(select(DailyTotal).where(key).with_for_update()).scalar_one_or_none()
+    if total is None:
+        return
+
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    count, amount_sum, amount_min, amount_max = db.session.execute(
+        select(
+            func.count(),
+            func.sum(Record.amount_minor),
+            func.min(Record.amount_minor),
+            func.max(Record.amount_minor),
+        ).where(
+            Record.user_id == user_id,
+            Record.category_id == category_id,
+            Record.datetime >= start,
+            Record.datetime < start + timedelta(days=1),
+        )
+    ).one()
+    if count == 0:
+        db.session.delete(total)
+    else:
+        total.count = count
+        total.amount_sum = amount_sum
+        total.amount_min = amount_min
+        total.amount_max = amount_max
+
+
+def rebuild():
+    day = day_expr(Record.datetime)
+    db.session.execute(delete(DailyTotal))
+    db.session.execute(
+        insert(DailyTotal).from_select(
+            ["user_id", "category_id", "day", "count", "amount_sum", "amount_min", "amount_max"],
+            select(
+                Record.user_id,
+                Record.category_id,
+                day,
+                func.count(),
+                func.sum(Record.amount_minor),
+                func.min(Record.amount_minor),
+                func.max(Record.amount_minor),
+            ).group_by(Record.user_id, Record.category_id, day),
+        )
+    )
+    db.session.commit()
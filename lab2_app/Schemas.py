@@ -1,6 +1,15 @@
+import base64
+import json
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from decimal import Decimal, InvalidOperation
 from marshmallow import Schema, fields, validate, validates, ValidationError, pre_load
 
+from . import Money
+from .Validation import compiled
+
+MAX_PAGE_SIZE = 1000
+
 def _strip_string(v):
     if isinstance(v, str):
         v = v.strip()
@@ -9,6 +18,41 @@ def _strip_string(v):
         return v
     raise ValidationError("string expected")
 
+def encode_cursor(dt, record_id):
+    raw = json.dumps([dt.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+class CursorField(fields.Field):
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, str) or not value:
+            raise ValidationError("cursor is invalid")
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+            dt, record_id = json.loads(raw)
+            dt = datetime.fromisoformat(dt)
+        except (ValueError, TypeError):
+            raise ValidationError("cursor is invalid")
+        if not isinstance(record_id, int) or record_id < 1:
+            raise ValidationError("cursor is invalid")
+        return dt, record_id
+
+def encode_id_cursor(last_id):
+    raw = json.dumps([last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+class IdCursorField(fields.Field):
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, str) or not value:
+            raise ValidationError("cursor is invalid")
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+            (last_id,) = json.loads(raw)
+        except (ValueError, TypeError):
+            raise ValidationError("cursor is invalid")
+        if not isinstance(last_id, int) or last_id < 1:
+            raise ValidationError("cursor is invalid")
+        return last_id
+
 class BaseSchema(Schema):
     @pre_load
     def strip_all_strings(self, data, **kwargs):
@@ -74,6 +118,11 @@ class CategoryDeleteSchema(BaseSchema):
         error_messages={"required": "category id is required"},
     )
 
+class UserQuerySchema(BaseSchema):
+    limit = fields.Integer(required=False, strict=True, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    cursor = IdCursorField(required=False)
+    prefix = fields.String(required=False, validate=validate.Length(min=1, max=64))
+
 class CategoryQuerySchema(BaseSchema):
     user_id = fields.Integer(
         required=False,
@@ -102,34 +151,66 @@ class RecordCreateSchema(BaseSchema):
     datetime = fields.DateTime(required=True, format="iso")
     amount = fields.String(required=True)
 
-    @pre_load
-    def normalize(self, data, **kwargs):
-        if "amount" in data and isinstance(data["amount"], str):
-            data["amount"] = data["amount"].strip()
-        return data
-
     @validates("amount")
     def validate_amount(self, value):
         try:
             dec = Decimal(str(value))
         except (InvalidOperation, ValueError):
             raise ValidationError("amount must be a number")
-        if dec == Decimal("NaN"):
+        if dec.is_nan():
             raise ValidationError("amount is invalid (NaN)")
+        if not dec.is_finite():
+            raise ValidationError("amount must be a number")
         if dec <= Decimal("0"):
             raise ValidationError("amount must be > 0")
+        minor = dec.scaleb(Money.scale())
+        if minor != minor.to_integral_value():
+            raise ValidationError(f"amount must have at most {Money.scale()} decimal places")
+        if minor > Money.MAX_MINOR:
+            raise ValidationError("amount is too large")
 
 class RecordQuerySchema(BaseSchema):
     user_id = fields.Integer(required=False, strict=True, validate=validate.Range(min=1))
     category_id = fields.Integer(required=False, strict=True, validate=validate.Range(min=1))
+    limit = fields.Integer(required=False, strict=True, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    cursor = CursorField(required=False)
+    format = fields.String(required=False, validate=validate.OneOf(["json", "ndjson"]))
+    date_from = fields.DateTime(required=False, format="iso", data_key="from")
+    date_to = fields.DateTime(required=False, format="iso", data_key="to")
 
-record_user_query_schema = RecordUserQuerySchema()
-user_id_path_schema = UserIdPathSchema()
-user_create_schema = UserCreateSchema()
-category_create_schema = CategoryCreateSchema()
-category_delete_schema = CategoryDeleteSchema()
-category_query_schema = CategoryQuerySchema()
-record_id_path_schema = RecordIdPathSchema()
-record_create_schema = RecordCreateSchema()
-record_query_schema = RecordQuerySchema()
-login_schema = LoginSchema()
+class RecordSummaryQuerySchema(BaseSchema):
+    user_id = fields.Integer(required=True, strict=True, validate=validate.Range(min=1))
+    category_id = fields.Integer(required=False, strict=True, validate=validate.Range(min=1))
+    date_from = fields.DateTime(required=False, format="iso", data_key="from")
+    date_to = fields.DateTime(required=False, format="iso", data_key="to")
+    group_by = fields.List(
+        fields.String(validate=validate.OneOf(["category", "day", "week", "month"])),
+        required=False,
+    )
+    tz = fields.String(required=False)
+
+    @validates("group_by")
+    def validate_group_by(self, value):
+        if len([g for g in value if g != "category"]) > 1:
+            raise ValidationError("only one time bucket is allowed")
+
+    @validates("tz")
+    def validate_tz(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValidationError("unknown time zone")
+
+record_user_query_schema = compiled(RecordUserQuerySchema())
+user_id_path_schema = compiled(UserIdPathSchema())
+user_query_schema = compiled(UserQuerySchema())
+user_create_schema = compiled(UserCreateSchema())
+category_create_schema = compiled(CategoryCreateSchema())
+category_delete_schema = compiled(CategoryDeleteSchema())
+category_query_schema = compiled(CategoryQuerySchema())
+record_id_path_schema = compiled(RecordIdPathSchema())
+record_create_schema = compiled(RecordCreateSchema())
+record_bulk_schema = compiled(RecordCreateSchema(many=True))
+record_query_schema = compiled(RecordQuerySchema())
+record_summary_query_schema = compiled(RecordSummaryQuerySchema())
+login_schema = compiled(LoginSchema())
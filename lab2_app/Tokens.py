@@ -0,0 +1,248 @@
+import contextvars
+import functools
+import hashlib
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from . import db
+from .Cache import MemoryBackend
+from .Models import RevokedUser, User
+
+log = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.to_bytes(8, "little", signed=True), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class WouldBlock(Exception):
+    # Raised instead of querying when the caller is on an event loop
+    # (AsyncViews); it retries the verification on a thread.
+    pass
+
+
+_on_event_loop = contextvars.ContextVar("tokens_on_event_loop", default=False)
+
+
+@contextmanager
+def on_event_loop():
+    token = _on_event_loop.set(True)
+    try:
+        yield
+    finally:
+        _on_event_loop.reset(token)
+
+
+def off_loop(func):
+    # func for run_in_executor: runs in a copy of the caller's context, so
+    # the request and app contexts come along, with lookups allowed.
+    context = contextvars.copy_context()
+    context.run(_on_event_loop.set, False)
+    return functools.partial(context.run, func)
+
+
+def _execute(stmt):
+    if _on_event_loop.get():
+        raise WouldBlock
+    return db.session.execute(stmt)
+
+
+def _aware(value):
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class RevocationList:
+    # Every worker keeps a Bloom filter of revoked user ids. Most tokens miss
+    # it and cost a few hash probes; a hit is confirmed against revoked_users
+    # (cached), so false positives never reject a valid token. A side thread
+    # pulls revocations from other workers every sync_interval, re-reading an
+    # overlap window so rows from transactions that committed late are not
+    # skipped; requests never wait for it. Until its first load every id
+    # counts as a hit.
+    def __init__(self, app=None, capacity=100_000, error_rate=0.01, sync_interval=1.0, overlap=60, exact_size=10_000):
+        self.app = app
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.overlap = timedelta(seconds=overlap)
+        self.exact_size = exact_size
+        self.bloom = BloomFilter(capacity, error_rate)
+        self._exact = OrderedDict()
+        self._synced_at = None
+        self._ready = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, name="revocations", daemon=True).start()
+                self._pid = os.getpid()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    self.sync()
+                except Exception:
+                    log.exception("revocation sync failed")
+            self._stop.wait(self.sync_interval)
+
+    def is_revoked(self, user_id, issued_at):
+        if self._ready and user_id not in self.bloom:
+            return False
+        revoked_at = self._revoked_at(user_id)
+        # Tokens issued after the revocation belong to a later user with the
+        # same id (SQLite may reuse ids), not to the deleted one.
+        return revoked_at is not None and issued_at <= revoked_at.timestamp()
+
+    def revoke(self, user_id, revoked_at):
+        with self._lock:
+            self._add(user_id, revoked_at)
+
+    def sync(self):
+        # Only the in-memory merge holds the lock, never the query.
+        since = self._synced_at
+        started = datetime.now(timezone.utc)
+        q = select(RevokedUser.user_id, RevokedUser.revoked_at)
+        if since is not None:
+            q = q.where(RevokedUser.revoked_at >= since - self.overlap)
+        rows = db.session.execute(q).all()
+
+        if since is None:
+            # First load or a rebuild: a new filter, built aside and swapped in.
+            capacity = self.bloom.capacity
+            while len(rows) > capacity:
+                capacity *= 2
+            bloom = BloomFilter(capacity, self.error_rate)
+            for user_id, _ in rows:
+                bloom.add(user_id)
+            with self._lock:
+                # Revocations applied here while the table was being read.
+                for user_id, revoked_at in self._exact.items():
+                    if revoked_at is not None:
+                        bloom.add(user_id)
+                self.bloom = bloom
+                for user_id, revoked_at in rows:
+                    if user_id in self._exact:
+                        self._merge(user_id, _aware(revoked_at))
+        else:
+            with self._lock:
+                for user_id, revoked_at in rows:
+                    self._add(user_id, revoked_at)
+
+        # Past capacity the false positive rate climbs; the next sync
+        # rebuilds at twice the size.
+        self._synced_at = None if self.bloom.count > self.bloom.capacity else started
+        self._ready = True
+
+    def _add(self, user_id, revoked_at):
+        revoked_at = _aware(revoked_at)
+        known = self._exact.get(user_id)
+        if known is not None and revoked_at <= known:
+            # Already in the filter; the overlap re-reads every row it covers.
+            return
+        self.bloom.add(user_id)
+        self._merge(user_id, revoked_at)
+
+    def _merge(self, user_id, revoked_at):
+        known = self._exact.get(user_id)
+        if known is None or revoked_at > known:
+            self._exact[user_id] = revoked_at
+            self._exact.move_to_end(user_id)
+            self._trim()
+
+    def _revoked_at(self, user_id):
+        with self._lock:
+            if user_id in self._exact:
+                self._exact.move_to_end(user_id)
+                return self._exact[user_id]
+        revoked_at = _execute(
+            select(func.max(RevokedUser.revoked_at)).where(RevokedUser.user_id == user_id)
+        ).scalar()
+        if revoked_at is not None:
+            revoked_at = _aware(revoked_at)
+        with self._lock:
+            # Misses are cached too; a later revocation overwrites them in _add.
+            self._exact.setdefault(user_id, revoked_at)
+            self._trim()
+        return revoked_at
+
+    def _trim(self):
+        while len(self._exact) > self.exact_size:
+            self._exact.popitem(last=False)
+
+
+revocations = RevocationList()
+live_users = MemoryBackend()
+
+
+def configure(app):
+    global revocations, live_users
+    revocations.stop()
+    revocations = RevocationList(
+        app,
+        app.config.get("REVOCATION_BLOOM_CAPACITY", 100_000),
+        app.config.get("REVOCATION_BLOOM_ERROR_RATE", 0.01),
+        app.config.get("REVOCATION_SYNC_INTERVAL", 1.0),
+        app.config.get("REVOCATION_SYNC_OVERLAP", 60),
+        app.config.get("REVOCATION_EXACT_CACHE_SIZE", 10_000),
+    )
+    live_users = MemoryBackend(app.config.get("JWT_USER_CACHE_SIZE", 10_000), app.config.get("JWT_USER_CACHE_TTL", 60))
+    app.before_request(revocations.ensure_started)
+
+
+def lookup_user(user_id):
+    user = live_users.get(user_id)
+    if user is None:
+        row = _execute(select(User.id, User.name).where(User.id == user_id, User.deleted_at.is_(None))).first()
+        if row is None:
+            return None
+        user = {"id": row.id, "name": row.name}
+        live_users.set(user_id, user)
+    return user
+
+
+def record_revocation(user_id):
+    # Written in the caller's transaction; apply_revocation() after commit.
+    revoked_at = datetime.now(timezone.utc)
+    db.session.add(RevokedUser(user_id=user_id, revoked_at=revoked_at))
+    return revoked_at
+
+
+def apply_revocation(user_id, revoked_at):
+    revocations.revoke(user_id, revoked_at)
+    live_users.delete(user_id)
@@ -1,28 +1,130 @@
-import os
+import click
 
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
-from flask_smorest import Api
 
-db = SQLAlchemy()
-migrate = Migrate()
+from .Replicas import RoutingSession
 
-app = Flask(__name__)
-app.config.from_pyfile("config.py", silent=True)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+jwt = JWTManager()
 
-db.init_app(app)
-migrate.init_app(app, db)
-api = Api(app)
-jwt = JWTManager(app)
 
-from . import Models
-from . import views
+@jwt.user_lookup_loader
+def load_user(jwt_header, jwt_data):
+    from .Tokens import lookup_user
+    return lookup_user(int(jwt_data["sub"]))
 
 
-@app.cli.command("test_data")
-def seed_command():
-    from .Data import test_data
-    test_data(reset=False)
-    print("test data downloaded")
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_data):
+    from .Tokens import revocations
+    return revocations.is_revoked(int(jwt_data["sub"]), jwt_data["iat"])
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.from_pyfile("Config.py", silent=True)
+    if config:
+        app.config.update(config)
+
+    from . import Cache, Deletions, Json, Metrics, Money, Passwords, Pool, Replicas, Tokens
+    Json.configure(app)
+    Pool.configure(app)
+    db.init_app(app)
+    jwt.init_app(app)
+    Tokens.configure(app)
+    Metrics.configure(app)
+    Replicas.configure(app)
+    Passwords.configure(app)
+    Cache.configure(app)
+    Money.configure(app)
+    Deletions.configure(app)
+
+    # Alembic and the OpenAPI machinery are only imported when enabled, so
+    # serving processes that never migrate don't pay for them.
+    if app.config.get("MIGRATIONS_ENABLED", True):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    if app.config.get("OPENAPI_ENABLED", True):
+        from flask_smorest import Api
+        Api(app)
+
+    from . import Models
+    from .views import bp
+    app.register_blueprint(bp)
+    register_commands(app)
+    return app
+
+
+def register_commands(app):
+    @app.cli.command("test_data")
+    def seed_command():
+        from .Data import test_data
+        test_data(reset=False)
+        print("test data downloaded")
+
+    @app.cli.command("synthetic_data")
+    @click.option("--users", default=10_000, show_default=True)
+    @click.option("--categories", default=1_000, show_default=True)
+    @click.option("--records", default=50_000_000, show_default=True)
+    @click.option("--since", default=None, help="first day of the date span, YYYY-MM-DD (default: DAYS ago)")
+    @click.option("--days", default=365, show_default=True, help="length of the date span")
+    @click.option("--skew", default=1.1, show_default=True, help="Zipf exponent for user/category popularity")
+    @click.option("--seed", default=42, show_default=True)
+    @click.option("--chunk", default=100_000, show_default=True, help="rows per COPY and commit; keep it when resuming")
+    def synthetic_data_command(users, categories, records, since, days, skew, seed, chunk):
+        from datetime import date
+        from .Data import synthetic_data
+        try:
+            total = synthetic_data(
+                users, categories, records, date.fromisoformat(since) if since else None,
+                days, skew, seed, chunk, report=lambda done, total: print(f"records: {done}/{total}"),
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        print(f"synthetic data ready: {users} users, {categories} categories, {total} records")
+
+    @app.cli.command("rebuild_rollup")
+    def rebuild_rollup_command():
+        from .Rollup import rebuild
+        rebuild()
+        print("daily totals rebuilt")
+
+    @app.cli.command("create_partitions")
+    @click.option("--since", default=None, help="first month to cover, YYYY-MM (default: current month)")
+    @click.option("--ahead", default=3, show_default=True, help="future months to create")
+    def create_partitions_command(since, ahead):
+        from .Partitions import ensure_partitions, is_partitioned, parse_month
+        if not is_partitioned():
+            # Boot scripts call this unconditionally (SQLite, an unmigrated database).
+            print("records is not a partitioned table; nothing to do")
+            return
+        created = ensure_partitions(parse_month(since) if since else None, ahead)
+        print(f"partitions created: {', '.join(created) or 'none'}")
+
+    @app.cli.command("detach_partition")
+    @click.argument("month")
+    def detach_partition_command(month):
+        from .Partitions import detach_partition, is_partitioned, parse_month
+        if not is_partitioned():
+            raise click.ClickException("records is not a partitioned table")
+        name = detach_partition(parse_month(month))
+        print(f"{name} detached; archive or drop it when ready")
+
+    @app.cli.command("purge_deletions")
+    def purge_deletions_command():
+        from .Deletions import run_pending
+        done = run_pending(
+            app.config.get("DELETION_BATCH_SIZE", 5000),
+            app.config.get("DELETION_PAUSE_MS", 100) / 1000,
+            app.config.get("DELETION_STALE_SECONDS", 60),
+            app.config.get("DELETION_MAX_ATTEMPTS", 5),
+            app.config.get("DELETION_RETRY_SECONDS", 30),
+        )
+        print(f"deletions finished: {done}")
+
+    @app.cli.command("index_audit")
+    def index_audit_command():
+        from .IndexAudit import report
+        print(report(db.metadata))
@@ -0,0 +1,5 @@
+from . import create_app
+from .AsyncViews import asgi_app
+
+# Read endpoints on the event loop, everything else through the Flask app.
+app = asgi_app(create_app({"MIGRATIONS_ENABLED": False}))
@@ -1,17 +1,30 @@
-from datetime import datetime
-from flask import request, jsonify
+import hashlib
+import json
+from datetime import datetime, timezone
+from itertools import islice
+from flask import Blueprint, current_app, g, request, jsonify, Response, stream_with_context
 from marshmallow import ValidationError
+from sqlalchemy import DateTime, cast, delete, func, insert, literal, null, or_, select, tuple_, update
 from sqlalchemy.exc import IntegrityError
 
 from flask_jwt_extended import (
     jwt_required,
     create_access_token,
 )
-from passlib.hash import pbkdf2_sha256
 
-from . import app, jwt
+from . import jwt
 from . import Schemas
-from .Models import db, User, Category, Record
+from . import Money
+from . import Pool
+from .Json import http_date
+from . import Rollup
+from . import Tokens
+from . import Deletions
+from .Cache import category_cache
+from .Passwords import VerifierBusy, hash_password, verify_password
+from .Models import db, User, Category, Record, DailyTotal, Deletion
+
+bp = Blueprint("api", __name__)
 
 
 
@@ -47,19 +60,35 @@ def missing_token_callback(error):
     )
 
 
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    return (
+        jsonify({"message": "The token has been revoked.", "error": "token_revoked"}),
+        401,
+    )
+
 
+@jwt.user_lookup_error_loader
+def user_lookup_error_callback(jwt_header, jwt_payload):
+    return (
+        jsonify({"message": "The token's user no longer exists.", "error": "user_not_found"}),
+        401,
+    )
 
-@app.route("/")
+
+
+
+@bp.route("/")
 def hello_world():
     return "<p>Hello, World!</p>", 200
 
 
-@app.route("/healthcheck")
+@bp.route("/healthcheck")
 def health_check():
     return {"status": "OK", "timestamp": datetime.now()}, 200
 
 
-@app.post("/register")
+@bp.post("/register")
 def register():
     try:
         body = Schemas.user_create_schema.load(request.get_json() or {})
@@ -68,51 +97,140 @@ def register():
 
     user = User(
         name=body["name"],
-        password=pbkdf2_sha256.hash(body["password"]),
+        password=hash_password(body["password"]),
     )
     db.session.add(user)
     try:
         db.session.commit()
     except IntegrityError as e:
         db.session.rollback()
+        if _name_pending_deletion(User, User.name == body["name"]):
+            return {"error": "user name belongs to a user being deleted, retry once the deletion is done"}, 409
         return {"error": "invalid registration data", "details": str(e.orig)}, 400
 
     return {"id": user.id, "user_name": user.name}, 201
 
 
-@app.post("/login")
+@bp.post("/login")
 def login():
     try:
         body = Schemas.login_schema.load(request.get_json() or {})
     except ValidationError as e:
         return {"error": "invalid login data", "details": e.messages}, 400
 
-    user = User.query.filter_by(name=body["name"]).first()
-    if user is None or not pbkdf2_sha256.verify(body["password"], user.password):
+    user = User.query.filter_by(name=body["name"], deleted_at=None).first()
+    if user is None:
         return {"error": "bad username or password"}, 401
+    try:
+        ok, new_hash = verify_password(body["password"], user.password)
+    except VerifierBusy:
+        return {"error": "too many login attempts, retry later"}, 503, {"Retry-After": "1"}
+    if not ok:
+        return {"error": "bad username or password"}, 401
+    if new_hash is not None:
+        # Best effort and outside the version check: two logins rehashing at
+        # once must not fail one of them on a stale version. The first wins.
+        db.session.execute(
+            update(User).where(User.id == user.id, User.password == user.password).values(password=new_hash),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
     access_token = create_access_token(identity=str(user.id))
     return {"access_token": access_token}, 200
 
 
 
 
-@app.get("/user/<int:user_id>")
+@bp.get("/user/<int:user_id>")
 @jwt_required()
 def read_person(user_id: int):
-    user = User.query.get(user_id)
+    user = db.session.execute(
+        select(User.id, User.name, User.version, User.updated_at)
+        .where(User.id == user_id, User.deleted_at.is_(None))
+    ).first()
     if user is None:
         return {"error": "user not found"}, 404
-    return {"id": user.id, "user_name": user.name}, 200
 
+    headers, not_modified = _conditional(f"u{user.id}-{user.version}", user.updated_at)
+    if not_modified:
+        return "", 304, headers
+    return {"id": user.id, "user_name": user.name}, 200, headers
 
-@app.get("/users")
+
+@bp.get("/users")
 @jwt_required()
 def read_people():
-    users = User.query.order_by(User.id.asc()).all()
-    return [{"id": u.id, "user_name": u.name} for u in users], 200
+    try:
+        params = Schemas.user_query_schema.load(_people_raw(request.args))
+    except ValidationError as e:
+        return {"error": "invalid query params", "details": e.messages}, 400
 
+    limit = params.get("limit", current_app.config.get("USERS_PAGE_SIZE", 100))
+    rows = db.session.execute(_people_query(params, limit)).all()
+    etag, body = _people_page(rows, limit)
+    headers, not_modified = _conditional(etag)
+    if not_modified:
+        return "", 304, headers
+    return body, 200, headers
 
-@app.post("/user")
+
+# The read endpoints are split into argument parsing, query building and
+# response building so the async fast path (AsyncViews.py) runs the same code.
+def _people_raw(args):
+    raw = {}
+    limit = args.get("limit", type=int)
+    if limit is not None:
+        raw["limit"] = limit
+    for key in ("cursor", "prefix"):
+        if key in args:
+            raw[key] = args[key]
+    return raw
+
+
+def _people_query(params, limit):
+    q = select(User.id, User.name, User.version).where(User.deleted_at.is_(None))
+    if "prefix" in params:
+        q = q.where(User.name.startswith(params["prefix"], autoescape=True))
+    if "cursor" in params:
+        q = q.where(User.id > params["cursor"])
+    # One extra row tells whether another page exists; no count(*).
+    return q.order_by(User.id.asc()).limit(limit + 1)
+
+
+def _people_page(rows, limit):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    digest = hashlib.blake2b(digest_size=12)
+    for uid, _, version in rows:
+        digest.update(f"{uid}:{version},".encode())
+    # next_cursor follows from the last id; whether there is a next page
+    # doesn't, and a user registered past the page changes it.
+    digest.update(b"more" if has_more else b"last")
+
+    items = [{"id": uid, "user_name": name} for uid, name, _ in rows]
+    next_cursor = Schemas.encode_id_cursor(rows[-1].id) if has_more else None
+    body = {"items": items, "counter": len(items), "has_more": has_more, "next_cursor": next_cursor}
+    return f"users-{digest.hexdigest()}", body
+
+
+def _conditional(etag, updated_at=None):
+    return _conditional_for(etag, updated_at, request.if_none_match, request.if_modified_since)
+
+
+def _conditional_for(etag, updated_at, if_none_match, if_modified_since):
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if updated_at is not None:
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        updated_at = updated_at.replace(microsecond=0)
+        headers["Last-Modified"] = http_date(updated_at)
+    if if_none_match:
+        return headers, if_none_match.contains(etag)
+    since = if_modified_since
+    return headers, since is not None and updated_at is not None and updated_at <= since
+
+
+@bp.post("/user")
 @jwt_required()
 def create_person():
     try:
@@ -122,7 +240,7 @@ def create_person():
 
     user = User(
         name=body["name"],
-        password=pbkdf2_sha256.hash(body["password"]),
+        password=hash_password(body["password"]),
     )
     db.session.add(user)
     try:
@@ -134,7 +252,7 @@ def create_person():
     return {"id": user.id, "user_name": user.name}, 201
 
 
-@app.delete("/user/<int:user_id>")
+@bp.delete("/user/<int:user_id>")
 @jwt_required()
 def drop_person(user_id: int):
     try:
@@ -142,17 +260,44 @@ def drop_person(user_id: int):
     except ValidationError as e:
         return {"error": "invalid user_id", "details": e.messages}, 400
 
-    user = User.query.get(user_id)
-    if user is None:
+    user = db.session.get(User, user_id)
+    if user is None or user.deleted_at is not None:
         return {"error": "user not found"}, 404
 
     name = user.name
+    revoked_at = Tokens.record_revocation(user_id)
+    if Deletions.background():
+        job = Deletions.enqueue("user", user)
+        db.session.commit()
+        Tokens.apply_revocation(user_id, revoked_at)
+        category_cache.invalidate(user_id)
+        Deletions.wake()
+        return _deletion_accepted(job, {"user_name": name})
+
     db.session.delete(user)
     db.session.commit()
+    Tokens.apply_revocation(user_id, revoked_at)
+    category_cache.invalidate(user_id)
     return {"result": f"id: {user_id} successfully deleted", "user_name": name}, 200
 
 
-@app.get("/category")
+def _deletion_accepted(job, body):
+    location = f"/deletions/{job.id}"
+    body = {"result": f"id: {job.target_id} scheduled for deletion", **body, "deletion_id": job.id,
+            "status_url": location}
+    return body, 202, {"Location": location}
+
+
+@bp.get("/deletions/<int:deletion_id>")
+@jwt_required()
+def read_deletion(deletion_id: int):
+    job = db.session.get(Deletion, deletion_id)
+    if job is None:
+        return {"error": "deletion not found"}, 404
+    return Deletions.status(job), 200
+
+
+@bp.get("/category")
 @jwt_required()
 def read_kinds():
     uid = request.args.get("user_id", type=int)
@@ -167,24 +312,53 @@ def read_kinds():
 
     uid = params.get("user_id")
 
-    q = Category.query
+    def load():
+        return _kinds_items(db.session.execute(_kinds_query(uid)))
+
+    # Only primary reads fill the shared cache.
+    etag, items = category_cache.get_or_load(uid, load, store=g.get("db_replica") is None)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if request.if_none_match.contains(etag):
+        return "", 304, headers
+    return items, 200, headers
+
+
+def _kinds_query(uid):
+    q = select(Category.id, Category.name, Category.owner_id).where(Category.deleted_at.is_(None))
     if uid is None:
-        q = q.filter(Category.owner_id.is_(None))
+        q = q.where(Category.owner_id.is_(None))
     else:
-        q = q.filter(Category.owner_id == uid)
+        q = q.where(Category.owner_id == uid)
+    return q.order_by(Category.id.asc())
 
-    cats = q.order_by(Category.id.asc()).all()
+
+def _kinds_items(rows):
     return [
         {
-            "id": c.id,
-            "category_name": c.name,
-            "user_id": c.owner_id,
+            "id": cat_id,
+            "category_name": name,
+            "user_id": owner_id,
         }
-        for c in cats
-    ], 200
+        for cat_id, name, owner_id in rows
+    ]
 
 
-@app.post("/category")
+@bp.get("/cache/stats")
+def cache_stats():
+    return {"categories": category_cache.stats()}, 200
+
+
+@bp.get("/db/pool")
+@jwt_required()
+def pool_status():
+    stats = Pool.status(db.engine)
+    router = current_app.extensions.get("replicas")
+    if router is not None:
+        stats["replicas"] = router.status()
+    return stats, 200
+
+
+@bp.post("/category")
 @jwt_required()
 def create_kind():
     try:
@@ -195,8 +369,8 @@ def create_kind():
     owner_id = body.get("user_id")
 
     if owner_id is not None:
-        owner = User.query.get(owner_id)
-        if owner is None:
+        owner = db.session.get(User, owner_id)
+        if owner is None or owner.deleted_at is not None:
             return {"error": "user not found"}, 404
 
     cat = Category(
@@ -208,7 +382,11 @@ def create_kind():
         db.session.commit()
     except IntegrityError as e:
         db.session.rollback()
+        same_owner = Category.owner_id.is_(None) if owner_id is None else Category.owner_id == owner_id
+        if _name_pending_deletion(Category, Category.name == body["name"], same_owner):
+            return {"error": "category name belongs to a category being deleted, retry once the deletion is done"}, 409
         return {"error": "invalid category data", "details": str(e.orig)}, 400
+    category_cache.invalidate(owner_id)
 
     return {
         "id": cat.id,
@@ -217,7 +395,7 @@ def create_kind():
     }, 201
 
 
-@app.delete("/category")
+@bp.delete("/category")
 @jwt_required()
 def drop_kind():
     try:
@@ -226,17 +404,26 @@ def drop_kind():
         return {"error": "invalid category id", "details": e.messages}, 400
 
     cid = body["id"]
-    cat = Category.query.get(cid)
-    if cat is None:
+    cat = db.session.get(Category, cid)
+    if cat is None or cat.deleted_at is not None:
         return {"error": "category not found"}, 404
 
     name = cat.name
+    owner_id = cat.owner_id
+    if Deletions.background():
+        job = Deletions.enqueue("category", cat)
+        db.session.commit()
+        category_cache.invalidate(owner_id)
+        Deletions.wake()
+        return _deletion_accepted(job, {"category_name": name})
+
     db.session.delete(cat)
     db.session.commit()
+    category_cache.invalidate(owner_id)
     return {"result": f"id: {cid} successfully deleted", "category_name": name}, 200
 
 
-@app.get("/record/<int:record_id>")
+@bp.get("/record/<int:record_id>")
 @jwt_required()
 def read_entry(record_id: int):
     try:
@@ -244,20 +431,29 @@ def read_entry(record_id: int):
     except ValidationError as e:
         return {"error": "invalid record_id", "details": e.messages}, 400
 
-    rec = Record.query.get(record_id)
+    rec = db.session.execute(_entry_query(record_id)).first()
     if rec is None:
         return {"error": "record not found"}, 404
 
-    return {
-        "id": rec.id,
-        "user_id": rec.user_id,
-        "category_id": rec.category_id,
-        "datetime": rec.datetime,
-        "amount": str(rec.amount),
-    }, 200
+    headers, not_modified = _conditional(f"r{rec.id}-{rec.version}", rec.updated_at)
+    if not_modified:
+        return "", 304, headers
+    return _entry_item(rec), 200, headers
 
 
-@app.delete("/record/<int:record_id>")
+def _entry_query(record_id):
+    return select(
+        Record.id,
+        Record.user_id,
+        Record.category_id,
+        Record.datetime,
+        Record.amount_minor,
+        Record.version,
+        Record.updated_at,
+    ).where(Record.id == record_id, *_live(Record.user_id, Record.category_id))
+
+
+@bp.delete("/record/<int:record_id>")
 @jwt_required()
 def drop_entry(record_id: int):
     try:
@@ -265,25 +461,26 @@ def drop_entry(record_id: int):
     except ValidationError as e:
         return {"error": "invalid record_id", "details": e.messages}, 400
 
-    rec = Record.query.get(record_id)
+    # One statement, so a user or category queued for deletion in between
+    # can't slip past the check; their records belong to the purge.
+    rec = db.session.execute(
+        delete(Record)
+        .where(Record.id == record_id, *_live(Record.user_id, Record.category_id))
+        .returning(Record.id, Record.user_id, Record.category_id, Record.datetime, Record.amount_minor),
+        execution_options={"synchronize_session": False},
+    ).first()
     if rec is None:
+        db.session.rollback()
         return {"error": "record not found"}, 404
 
-    deleted = {
-        "id": rec.id,
-        "user_id": rec.user_id,
-        "category_id": rec.category_id,
-        "datetime": rec.datetime,
-        "amount": str(rec.amount),
-    }
-
-    db.session.delete(rec)
+    deleted = _entry_item(rec)
+    Rollup.refresh_day(rec.user_id, rec.category_id, Rollup.utc_day(rec.datetime))
     db.session.commit()
 
     return {"result": f"id: {record_id} successfully deleted", "deleted": deleted}, 200
 
 
-@app.post("/record")
+@bp.post("/record")
 @jwt_required()
 def create_entry():
     try:
@@ -291,78 +488,423 @@ def create_entry():
     except ValidationError as e:
         return {"error": "invalid record data", "details": e.messages}, 400
 
-    user = User.query.get(body["user_id"])
-    if user is None:
-        return {"error": "user not found"}, 404
-
-    cat = Category.query.get(body["category_id"])
-    if cat is None:
-        return {"error": "category not found"}, 404
-
-    if cat.owner_id is not None and cat.owner_id != user.id:
-        return {"error": "category not available for this user"}, 403
+    uid = body["user_id"]
+    cid = body["category_id"]
+    # Existence and ownership are checked by the INSERT itself; the extra
+    # lookups below only run to pick the error when nothing was inserted.
+    stmt = insert(Record).from_select(
+        ["user_id", "category_id", "datetime", "amount_minor"],
+        select(
+            literal(uid),
+            Category.id,
+            literal(body["datetime"], Record.datetime.type),
+            literal(Money.to_minor(body["amount"]), Record.amount_minor.type),
+        ).where(
+            Category.id == cid,
+            Category.deleted_at.is_(None),
+            or_(Category.owner_id.is_(None), Category.owner_id == uid),
+            select(User.id).where(User.id == uid, User.deleted_at.is_(None)).exists(),
+        ),
+    ).returning(Record.id, Record.user_id, Record.category_id, Record.datetime, Record.amount_minor)
 
-    rec = Record(
-        user_id=user.id,
-        category_id=cat.id,
-        datetime=body["datetime"],
-        amount=float(body["amount"]),
-    )
-    db.session.add(rec)
     try:
-        db.session.commit()
+        rec = db.session.execute(stmt).first()
+        if rec is not None:
+            Rollup.add_records([rec._asdict()])
+            db.session.commit()
     except IntegrityError as e:
         db.session.rollback()
         return {"error": "invalid record data", "details": str(e.orig)}, 400
 
+    if rec is None:
+        db.session.rollback()
+        user = db.session.get(User, uid)
+        if user is None or user.deleted_at is not None:
+            return {"error": "user not found"}, 404
+        cat = db.session.get(Category, cid)
+        if cat is None or cat.deleted_at is not None:
+            return {"error": "category not found"}, 404
+        return {"error": "category not available for this user"}, 403
+
     return {
         "record_id": rec.id,
         "user_id": rec.user_id,
         "category_id": rec.category_id,
         "datetime": rec.datetime,
-        "amount": str(rec.amount),
+        "amount": Money.format_minor(rec.amount_minor),
     }, 201
 
 
-@app.get("/record")
+@bp.post("/record/bulk")
+@jwt_required()
+def create_entries():
+    if request.mimetype == "application/x-ndjson":
+        items = _ndjson_items(request.stream)
+    else:
+        body = request.get_json(silent=True)
+        if not isinstance(body, list):
+            return {"error": "invalid record data", "details": "JSON array expected"}, 400
+        items = iter(body)
+
+    chunk_size = current_app.config.get("RECORDS_BULK_CHUNK", 5000)
+    inserted = 0
+    errors = []
+    index = 0
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        n, chunk_errors = _insert_chunk(chunk, index)
+        inserted += n
+        errors.extend(sorted(chunk_errors, key=lambda err: err["index"]))
+        index += len(chunk)
+
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}, 200
+
+
+def _ndjson_items(stream):
+    for line in iter(stream.readline, b""):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _insert_chunk(chunk, base):
+    errors = []
+    positions = []
+    bodies = []
+    for i, item in enumerate(chunk, start=base):
+        if isinstance(item, dict):
+            positions.append(i)
+            bodies.append(item)
+        else:
+            errors.append({"index": i, "error": "invalid record data", "details": "JSON object expected"})
+
+    try:
+        loaded = Schemas.record_bulk_schema.load(bodies)
+        invalid = {}
+    except ValidationError as e:
+        loaded, invalid = e.valid_data, e.messages
+
+    valid = []
+    for pos, (i, body) in enumerate(zip(positions, loaded)):
+        if pos in invalid:
+            errors.append({"index": i, "error": "invalid record data", "details": invalid[pos]})
+        else:
+            valid.append((i, body))
+
+    users, owners = _lookup_owners(
+        {body["user_id"] for _, body in valid},
+        {body["category_id"] for _, body in valid},
+    )
+
+    rows = []
+    indexes = []
+    for i, body in valid:
+        if body["user_id"] not in users:
+            errors.append({"index": i, "error": "user not found"})
+        elif body["category_id"] not in owners:
+            errors.append({"index": i, "error": "category not found"})
+        elif owners[body["category_id"]] not in (None, body["user_id"]):
+            errors.append({"index": i, "error": "category not available for this user"})
+        else:
+            indexes.append(i)
+            rows.append({
+                "user_id": body["user_id"],
+                "category_id": body["category_id"],
+                "datetime": body["datetime"],
+                "amount_minor": Money.to_minor(body["amount"]),
+            })
+
+    if not rows:
+        return 0, errors
+    try:
+        db.session.execute(insert(Record), rows)
+        Rollup.add_records(rows)
+        db.session.commit()
+    except IntegrityError:
+        # Something the lookups couldn't see, e.g. an owner deleted since.
+        # Only the rows at fault should fail, so redo the chunk row by row.
+        db.session.rollback()
+        return _insert_rows(rows, indexes, errors)
+    return len(rows), errors
+
+
+def _insert_rows(rows, indexes, errors):
+    inserted = []
+    for i, row in zip(indexes, rows):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(Record), [row])
+        except IntegrityError as e:
+            errors.append({"index": i, "error": "invalid record data", "details": str(e.orig)})
+        else:
+            inserted.append(row)
+    Rollup.add_records(inserted)
+    db.session.commit()
+    return len(inserted), errors
+
+
+def _lookup_owners(user_ids, category_ids):
+    if not user_ids:
+        return set(), {}
+    q = select(literal("user"), User.id, null()).where(User.id.in_(user_ids), User.deleted_at.is_(None)).union_all(
+        select(literal("category"), Category.id, Category.owner_id)
+        .where(Category.id.in_(category_ids), Category.deleted_at.is_(None))
+    )
+    users = set()
+    owners = {}
+    for kind, key, owner_id in db.session.execute(q):
+        if kind == "user":
+            users.add(key)
+        else:
+            owners[key] = owner_id
+    return users, owners
+
+
+@bp.get("/record")
 @jwt_required()
 def query_entries():
-    uid = request.args.get("user_id", type=int)
-    cid = request.args.get("category_id", type=int)
-    if uid is None and cid is None:
+    raw = _entries_raw(request.args)
+    if "user_id" not in raw and "category_id" not in raw:
         return {"error": "provide user_id and/or category_id"}, 400
 
-    raw = {}
-    if uid is not None:
-        raw["user_id"] = uid
-    if cid is not None:
-        raw["category_id"] = cid
-
     try:
         params = Schemas.record_query_schema.load(raw)
     except ValidationError as e:
         return {"error": "invalid query params", "details": e.messages}, 400
 
+    q = _entries_query(params)
+    if params.get("format") == "ndjson":
+        if "limit" in params:
+            q = q.limit(params["limit"])
+        return Response(
+            stream_with_context(_stream_entries(q)),
+            mimetype="application/x-ndjson",
+        )
+
+    limit = params.get("limit", current_app.config.get("RECORDS_PAGE_SIZE", 100))
+    rows = db.session.execute(q.limit(limit + 1)).all()
+    return _entries_page(rows, limit), 200
+
+
+def _entries_raw(args):
+    raw = {}
+    for key in ("user_id", "category_id", "limit"):
+        value = args.get(key, type=int)
+        if value is not None:
+            raw[key] = value
+    for key in ("cursor", "format", "from", "to"):
+        if key in args:
+            raw[key] = args[key]
+    return raw
+
+
+def _entries_query(params):
     uid = params.get("user_id")
     cid = params.get("category_id")
-
-    q = Record.query
+    cursor = params.get("cursor")
+
+    q = select(
+        Record.id,
+        Record.user_id,
+        Record.category_id,
+        Record.datetime,
+        Record.amount_minor,
+    ).where(*_live(Record.user_id, Record.category_id))
     if uid is not None:
-        q = q.filter(Record.user_id == uid)
+        q = q.where(Record.user_id == uid)
     if cid is not None:
-        q = q.filter(Record.category_id == cid)
+        q = q.where(Record.category_id == cid)
+    if "date_from" in params:
+        q = q.where(Record.datetime >= params["date_from"])
+    if "date_to" in params:
+        q = q.where(Record.datetime < params["date_to"])
+    if cursor is not None:
+        # The plain datetime bound is redundant with the row comparison but
+        # lets Postgres prune partitions newer than the cursor.
+        q = q.where(
+            Record.datetime <= cursor[0],
+            tuple_(Record.datetime, Record.id) < tuple_(*cursor),
+        )
+    return q.order_by(Record.datetime.desc(), Record.id.desc())
+
+
+def _name_pending_deletion(model, *criteria):
+    # A row queued for background deletion keeps its unique name until the
+    # purge removes it.
+    return db.session.scalar(select(model.id).where(*criteria, model.deleted_at.is_not(None)).limit(1)) is not None
+
+
+def _live(user_col, category_col):
+    # Users and categories queued for background deletion keep their rows
+    # until the purge reaches them; both lists are tiny (partial indexes).
+    return (
+        user_col.not_in(select(User.id).where(User.deleted_at.is_not(None))),
+        category_col.not_in(select(Category.id).where(Category.deleted_at.is_not(None))),
+    )
+
+
+def _entries_page(rows, limit):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = _entry_items(rows)
+    next_cursor = None
+    if has_more:
+        next_cursor = Schemas.encode_cursor(rows[-1].datetime, rows[-1].id)
 
-    records = q.order_by(Record.datetime.desc(), Record.id.desc()).all()
+    return {"items": items, "counter": len(items), "next_cursor": next_cursor}
 
-    items = [
+
+def _entry_item(r):
+    return {
+        "id": r.id,
+        "user_id": r.user_id,
+        "category_id": r.category_id,
+        "datetime": r.datetime,
+        "amount": Money.format_minor(r.amount_minor),
+    }
+
+
+def _entry_items(rows):
+    # Rows of (id, user_id, category_id, datetime, amount_minor); unpacking
+    # by position skips the per-row attribute lookups of _entry_item.
+    format_minor = Money.format_minor
+    return [
         {
-            "id": r.id,
-            "user_id": r.user_id,
-            "category_id": r.category_id,
-            "datetime": r.datetime,
-            "amount": str(r.amount),
+            "id": rid,
+            "user_id": uid,
+            "category_id": cid,
+            "datetime": http_date(dt),
+            "amount": format_minor(amount),
         }
-        for r in records
+        for rid, uid, cid, dt, amount in rows
     ]
 
-    return {"items": items, "counter": len(items)}, 200
+
+def _stream_entries(q):
+    chunk = current_app.config.get("RECORDS_STREAM_CHUNK", 1000)
+    dumps = current_app.json.dumps
+    result = db.session.execute(q.execution_options(yield_per=chunk))
+    for rows in result.partitions():
+        yield "".join(dumps(item) + "\n" for item in _entry_items(rows))
+
+
+@bp.get("/record/summary")
+@jwt_required()
+def summarize_entries():
+    raw = {}
+    for key in ("user_id", "category_id"):
+        value = request.args.get(key, type=int)
+        if value is not None:
+            raw[key] = value
+    for key in ("from", "to", "tz"):
+        if key in request.args:
+            raw[key] = request.args[key]
+    group_by = [g for arg in request.args.getlist("group_by") for g in arg.split(",") if g]
+    if group_by:
+        raw["group_by"] = group_by
+
+    try:
+        params = Schemas.record_summary_query_schema.load(raw)
+    except ValidationError as e:
+        return {"error": "invalid query params", "details": e.messages}, 400
+
+    group_by = params.get("group_by", ["category"])
+    tz = params.get("tz", "UTC")
+    if _is_utc(tz) and _on_utc_day(params.get("date_from")) and _on_utc_day(params.get("date_to")):
+        q = _summary_from_rollup(params, group_by)
+    else:
+        q = _summary_from_records(params, group_by, tz)
+
+    keys = [c for c in ("category_id", "bucket") if c in q.selected_columns]
+    groups = []
+    for row in db.session.execute(q.group_by(*keys).order_by(*keys)):
+        group = {key: getattr(row, key) for key in keys}
+        group.update({
+            "count": row.count,
+            "sum": Money.format_minor(row.sum),
+            "min": Money.format_minor(row.min),
+            "max": Money.format_minor(row.max),
+            "avg": Money.format_minor(Money.average_minor(row.sum, row.count)),
+        })
+        groups.append(group)
+
+    return {"groups": groups, "counter": len(groups)}, 200
+
+
+def _is_utc(tz):
+    return tz in ("UTC", "Etc/UTC")
+
+
+def _on_utc_day(dt):
+    if dt is None:
+        return True
+    if dt.tzinfo is not None and dt.utcoffset():
+        return False
+    return dt.time() == datetime.min.time()
+
+
+def _summary_from_records(params, group_by, tz):
+    keys = []
+    if "category" in group_by:
+        keys.append(Record.category_id.label("category_id"))
+    for unit in ("day", "week", "month"):
+        if unit in group_by:
+            keys.append(_bucket_expr(Record.datetime, unit, tz).label("bucket"))
+
+    q = select(
+        *keys,
+        func.count().label("count"),
+        func.sum(Record.amount_minor).label("sum"),
+        func.min(Record.amount_minor).label("min"),
+        func.max(Record.amount_minor).label("max"),
+    ).where(Record.user_id == params["user_id"], *_live(Record.user_id, Record.category_id))
+    if "category_id" in params:
+        q = q.where(Record.category_id == params["category_id"])
+    if "date_from" in params:
+        q = q.where(Record.datetime >= params["date_from"])
+    if "date_to" in params:
+        q = q.where(Record.datetime < params["date_to"])
+    return q
+
+
+def _summary_from_rollup(params, group_by):
+    keys = []
+    if "category" in group_by:
+        keys.append(DailyTotal.category_id.label("category_id"))
+    for unit in ("day", "week", "month"):
+        if unit in group_by:
+            keys.append(_bucket_expr(DailyTotal.day, unit).label("bucket"))
+
+    q = select(
+        *keys,
+        func.sum(DailyTotal.count).label("count"),
+        func.sum(DailyTotal.amount_sum).label("sum"),
+        func.min(DailyTotal.amount_min).label("min"),
+        func.max(DailyTotal.amount_max).label("max"),
+    ).where(DailyTotal.user_id == params["user_id"], *_live(DailyTotal.user_id, DailyTotal.category_id))
+    if "category_id" in params:
+        q = q.where(DailyTotal.category_id == params["category_id"])
+    if "date_from" in params:
+        q = q.where(DailyTotal.day >= params["date_from"].date())
+    if "date_to" in params:
+        q = q.where(DailyTotal.day < params["date_to"].date())
+    return q
+
+
+def _bucket_expr(column, unit, tz=None):
+    if db.engine.dialect.name == "postgresql":
+        local = func.timezone(tz, column) if tz else cast(column, DateTime)
+        return func.to_char(func.date_trunc(unit, local), "YYYY-MM-DD")
+    # SQLite stand-in for local runs: buckets are computed in stored time.
+    if unit == "day":
+        return func.strftime("%Y-%m-%d", column)
+    if unit == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", column)
@@ -0,0 +1,4 @@
+from . import create_app
+
+# Serving processes never run migrations.
+app = create_app({"MIGRATIONS_ENABLED": False})
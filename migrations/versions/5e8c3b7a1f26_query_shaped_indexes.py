@@ -0,0 +1,48 @@
+"""replace redundant indexes with query-shaped ones
+
+Revision ID: 5e8c3b7a1f26
+Revises: 9d2a61f0b8e4
+Create Date: 2026-10-18 14:55:08.243771
+
+"""
+from lab2_app.OnlineMigrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8c3b7a1f26'
+down_revision = '9d2a61f0b8e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /record?user_id=... and ?category_id=... order by (datetime DESC, id DESC);
+    # the INCLUDE columns make both index-only scans.
+    create_index_concurrently(
+        'idx_records_user_id_datetime_id',
+        'records',
+        'user_id, datetime DESC, id DESC',
+        include=['category_id', 'amount_minor'],
+    )
+    create_index_concurrently(
+        'idx_records_category_id_datetime_id',
+        'records',
+        'category_id, datetime DESC, id DESC',
+        include=['user_id', 'amount_minor'],
+    )
+    # Prefixes of the indexes above / of idx_records_user_id_category_id_datetime,
+    # or unused once records is partitioned by datetime.
+    drop_index_concurrently('ix_records_user_id', 'records')
+    drop_index_concurrently('ix_records_category_id', 'records')
+    drop_index_concurrently('ix_records_datetime', 'records')
+    # Prefix of uq_categories_owner_id_name.
+    drop_index_concurrently('ix_categories_owner_id', 'categories')
+
+
+def downgrade():
+    create_index_concurrently('ix_categories_owner_id', 'categories', 'owner_id')
+    create_index_concurrently('ix_records_datetime', 'records', 'datetime')
+    create_index_concurrently('ix_records_category_id', 'records', 'category_id')
+    create_index_concurrently('ix_records_user_id', 'records', 'user_id')
+    drop_index_concurrently('idx_records_category_id_datetime_id', 'records')
+    drop_index_concurrently('idx_records_user_id_datetime_id', 'records')
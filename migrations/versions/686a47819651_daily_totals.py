@@ -0,0 +1,42 @@
+"""daily totals
+
+Revision ID: 686a47819651
+Revises: f45e3687bdf1
+Create Date: 2026-10-18 10:12:41.318502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '686a47819651'
+down_revision = 'f45e3687bdf1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('amount_sum', sa.Float(), nullable=False),
+    sa.Column('amount_min', sa.Float(), nullable=False),
+    sa.Column('amount_max', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'category_id', 'day')
+    )
+    op.execute(
+        "INSERT INTO daily_totals "
+        "(user_id, category_id, day, count, amount_sum, amount_min, amount_max) "
+        "SELECT user_id, category_id, (datetime AT TIME ZONE 'UTC')::date, "
+        "count(*), sum(amount), min(amount), max(amount) "
+        "FROM records GROUP BY 1, 2, 3"
+    )
+
+
+def downgrade():
+    op.drop_table('daily_totals')
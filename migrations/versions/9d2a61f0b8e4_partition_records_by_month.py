@@ -0,0 +1,140 @@
+"""partition records by month
+
+Revision ID: 9d2a61f0b8e4
+Revises: c41f7e2a9d03
+Create Date: 2026-10-18 13:41:52.660218
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2a61f0b8e4'
+down_revision = 'c41f7e2a9d03'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 50000
+MONTHS_AHEAD = 3
+COLUMNS = "id, user_id, category_id, datetime, amount_minor, version, updated_at"
+INDEXES = {
+    'idx_records_user_id_category_id_datetime': '(user_id, category_id, datetime)',
+    'ix_records_category_id': '(category_id)',
+    'ix_records_datetime': '(datetime)',
+    'ix_records_user_id': '(user_id)',
+}
+
+
+def _add_months(month, n):
+    years, index = divmod(month.month - 1 + n, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def _create_month_partitions(first):
+    today = datetime.now(timezone.utc).date()
+    month = date(first.year, first.month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE records_y{month.year}m{month.month:02d} PARTITION OF records_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+    # Back-dated rows and months nobody created yet go here instead of
+    # failing the insert; create_partitions moves them out later.
+    op.execute("CREATE TABLE records_default PARTITION OF records_partitioned DEFAULT")
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.execute(
+        "CREATE TABLE records_partitioned ("
+        " id integer NOT NULL DEFAULT nextval('records_id_seq'),"
+        " user_id integer NOT NULL,"
+        " category_id integer NOT NULL,"
+        " datetime timestamptz NOT NULL,"
+        " amount_minor bigint NOT NULL,"
+        " version integer NOT NULL DEFAULT 1,"
+        " updated_at timestamptz NOT NULL DEFAULT now(),"
+        " CONSTRAINT records_partitioned_pkey PRIMARY KEY (id, datetime),"
+        " CONSTRAINT records_partitioned_amount_check CHECK (amount_minor > 0),"
+        " CONSTRAINT records_partitioned_user_id_fkey FOREIGN KEY (user_id)"
+        "  REFERENCES users (id) ON DELETE CASCADE,"
+        " CONSTRAINT records_partitioned_category_id_fkey FOREIGN KEY (category_id)"
+        "  REFERENCES categories (id) ON DELETE CASCADE"
+        ") PARTITION BY RANGE (datetime)"
+    )
+    first = bind.execute(sa.text("SELECT min(datetime) FROM records")).scalar()
+    _create_month_partitions((first or datetime.now(timezone.utc)).astimezone(timezone.utc).date())
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name}_p ON records_partitioned {columns}")
+
+    # Copy in committed id-range batches while the old table stays writable.
+    low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM records")).one()
+    if low is not None:
+        with op.get_context().autocommit_block():
+            for start in range(low, high + 1, BATCH_SIZE):
+                bind.execute(
+                    sa.text(
+                        f"INSERT INTO records_partitioned ({COLUMNS}) "
+                        f"SELECT {COLUMNS} FROM records WHERE id >= :start AND id < :stop"
+                    ),
+                    {"start": start, "stop": start + BATCH_SIZE},
+                )
+
+    # Records are never updated, so catching up means copying the rows that
+    # are missing and dropping ids deleted during the copy. Missing rows are
+    # found by id rather than above a watermark: a transaction that took its
+    # id before the batches ran may have committed after them. Writes wait
+    # only for this part.
+    op.execute("LOCK TABLE records IN EXCLUSIVE MODE")
+    op.execute(
+        f"INSERT INTO records_partitioned ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM records r "
+        f"WHERE NOT EXISTS (SELECT 1 FROM records_partitioned p WHERE p.id = r.id)"
+    )
+    op.execute(
+        "DELETE FROM records_partitioned p "
+        "WHERE NOT EXISTS (SELECT 1 FROM records r WHERE r.id = p.id)"
+    )
+    op.execute("ALTER SEQUENCE records_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE records")
+    op.execute("ALTER TABLE records_partitioned RENAME TO records")
+    op.execute("ALTER SEQUENCE records_id_seq OWNED BY records.id")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_partitioned_pkey TO records_pkey")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_partitioned_amount_check TO ck_records_amount_gt_zero")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_partitioned_user_id_fkey TO records_user_id_fkey")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_partitioned_category_id_fkey TO records_category_id_fkey")
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {name}_p RENAME TO {name}")
+
+
+def downgrade():
+    op.execute(
+        "CREATE TABLE records_plain ("
+        " id integer NOT NULL DEFAULT nextval('records_id_seq'),"
+        " user_id integer NOT NULL REFERENCES users (id) ON DELETE CASCADE,"
+        " category_id integer NOT NULL REFERENCES categories (id) ON DELETE CASCADE,"
+        " datetime timestamptz NOT NULL,"
+        " amount_minor bigint NOT NULL,"
+        " version integer NOT NULL DEFAULT 1,"
+        " updated_at timestamptz NOT NULL DEFAULT now(),"
+        " CONSTRAINT records_plain_pkey PRIMARY KEY (id),"
+        " CONSTRAINT records_plain_amount_check CHECK (amount_minor > 0)"
+        ")"
+    )
+    op.execute(f"INSERT INTO records_plain ({COLUMNS}) SELECT {COLUMNS} FROM records")
+    op.execute("ALTER SEQUENCE records_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE records CASCADE")
+    op.execute("ALTER TABLE records_plain RENAME TO records")
+    op.execute("ALTER SEQUENCE records_id_seq OWNED BY records.id")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_plain_pkey TO records_pkey")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_plain_amount_check TO ck_records_amount_gt_zero")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_plain_user_id_fkey TO records_user_id_fkey")
+    op.execute("ALTER TABLE records RENAME CONSTRAINT records_plain_category_id_fkey TO records_category_id_fkey")
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON records {columns}")
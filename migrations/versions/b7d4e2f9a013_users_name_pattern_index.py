@@ -0,0 +1,25 @@
+"""prefix search index on users.name
+
+Revision ID: b7d4e2f9a013
+Revises: 5e8c3b7a1f26
+Create Date: 2026-10-18 16:20:41.518307
+
+"""
+from lab2_app.OnlineMigrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d4e2f9a013'
+down_revision = '5e8c3b7a1f26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /users?prefix=... runs name LIKE 'prefix%'. ix_users_name uses the
+    # database collation, which LIKE can't use unless it is C.
+    create_index_concurrently('idx_users_name_pattern', 'users', 'name text_pattern_ops')
+
+
+def downgrade():
+    drop_index_concurrently('idx_users_name_pattern', 'users')
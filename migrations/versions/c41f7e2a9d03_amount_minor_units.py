@@ -0,0 +1,97 @@
+"""store amounts as integer minor units
+
+Revision ID: c41f7e2a9d03
+Revises: 3b9e0c1d5a72
+Create Date: 2026-10-18 12:20:05.117093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+from lab2_app.Money import scale_for
+from lab2_app.OnlineMigrations import backfill
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7e2a9d03'
+down_revision = '3b9e0c1d5a72'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 50000
+# The old CHECK kept amount > 0, but a positive amount under half a minor
+# unit (0.004 UAH) rounds to 0 and would only fail the new CHECK after the
+# backfill had rewritten the table. Such amounts become one minor unit, the
+# smallest positive value there is; everything else rounds half away from 0.
+TO_MINOR = 'greatest(1, round(amount::numeric * :factor))'
+
+
+def _factor():
+    return 10 ** scale_for(current_app.config.get("MONEY_CURRENCY", "UAH"))
+
+
+def _rebuild_daily_totals():
+    op.execute("DELETE FROM daily_totals")
+    op.execute(
+        "INSERT INTO daily_totals "
+        "(user_id, category_id, day, count, amount_sum, amount_min, amount_max) "
+        "SELECT user_id, category_id, (datetime AT TIME ZONE 'UTC')::date, "
+        "count(*), sum(amount_minor), min(amount_minor), max(amount_minor) "
+        "FROM records GROUP BY 1, 2, 3"
+    )
+
+
+def upgrade():
+    factor = _factor()
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount_minor', sa.BigInteger(), nullable=True))
+
+    # Committed id-range batches, so no single statement locks the whole table.
+    backfill(
+        'records',
+        f'amount_minor = {TO_MINOR}',
+        where='amount_minor IS NULL',
+        params={'factor': factor},
+        batch_size=BATCH_SIZE,
+    )
+
+    # Rows written by the old code while the backfill ran.
+    op.execute(
+        sa.text(
+            f"UPDATE records SET amount_minor = {TO_MINOR} "
+            "WHERE amount_minor IS NULL"
+        ).bindparams(factor=factor)
+    )
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_records_amount_gt_zero', type_='check')
+        batch_op.alter_column('amount_minor', nullable=False)
+        batch_op.drop_column('amount')
+        batch_op.create_check_constraint('ck_records_amount_gt_zero', 'amount_minor > 0')
+
+    with op.batch_alter_table('daily_totals', schema=None) as batch_op:
+        for column in ('amount_sum', 'amount_min', 'amount_max'):
+            batch_op.alter_column(column, type_=sa.BigInteger(), postgresql_using='0')
+    _rebuild_daily_totals()
+
+
+def downgrade():
+    factor = _factor()
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+    op.execute(
+        sa.text("UPDATE records SET amount = amount_minor::float8 / :factor").bindparams(factor=factor)
+    )
+    with op.batch_alter_table('records', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_records_amount_gt_zero', type_='check')
+        batch_op.alter_column('amount', nullable=False)
+        batch_op.drop_column('amount_minor')
+        batch_op.create_check_constraint('ck_records_amount_gt_zero', 'amount > 0')
+
+    with op.batch_alter_table('daily_totals', schema=None) as batch_op:
+        for column in ('amount_sum', 'amount_min', 'amount_max'):
+            batch_op.alter_column(
+                column,
+                type_=sa.Float(),
+                postgresql_using=f'{column}::float8 / {factor}',
+            )
@@ -0,0 +1,37 @@
+"""revoked users for JWT revocation
+
+Revision ID: d3a8f5c1e7b6
+Revises: b7d4e2f9a013
+Create Date: 2026-10-18 18:05:12.204417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f5c1e7b6'
+down_revision = 'b7d4e2f9a013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'revoked_users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('revoked_users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_revoked_users_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_revoked_users_revoked_at'), ['revoked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_revoked_users_revoked_at'))
+        batch_op.drop_index(batch_op.f('ix_revoked_users_user_id'))
+
+    op.drop_table('revoked_users')
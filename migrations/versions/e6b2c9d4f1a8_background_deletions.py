@@ -0,0 +1,63 @@
+"""soft-delete markers and queue for background deletions
+
+Revision ID: e6b2c9d4f1a8
+Revises: d3a8f5c1e7b6
+Create Date: 2026-10-18 19:42:37.916054
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from lab2_app.OnlineMigrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b2c9d4f1a8'
+down_revision = 'd3a8f5c1e7b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable without a default: a catalog-only change on Postgres.
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        'deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), server_default='pending', nullable=False),
+        sa.Column('total', sa.BigInteger(), nullable=True),
+        sa.Column('deleted', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('retry_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'idx_deletions_open', 'deletions', ['id'], unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+    create_index_concurrently('idx_users_deleted', 'users', 'id', where='deleted_at IS NOT NULL')
+    create_index_concurrently('idx_categories_deleted', 'categories', 'id', where='deleted_at IS NOT NULL')
+
+
+def downgrade():
+    drop_index_concurrently('idx_categories_deleted', 'categories')
+    drop_index_concurrently('idx_users_deleted', 'users')
+
+    op.drop_index('idx_deletions_open', table_name='deletions')
+    op.drop_table('deletions')
+
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,16 @@
+#!/usr/bin/env sh
+set -eu
+
+mode="${SERVER_MODE:-development}"
+
+if [ "$mode" = "production" ]; then
+  exec gunicorn --config gunicorn.conf.py "lab2_app.wsgi:app"
+fi
+
+if [ "$mode" = "async" ]; then
+  # One event loop per worker; read endpoints run on the async engine.
+  exec uvicorn lab2_app.asgi:app --host 0.0.0.0 --port "${FLASK_RUN_PORT:-8000}" \
+    --workers "${WEB_WORKERS:-$(nproc)}" --timeout-keep-alive "${WEB_KEEPALIVE:-5}" --no-access-log
+fi
+
+exec flask --app lab2_app run --host=0.0.0.0 --port="${FLASK_RUN_PORT:-8000}"
@@ -2,8 +2,9 @@
 set -euo pipefail
 
 
+# Only probe the connection here; the upgrade itself runs once below.
 retries=12
-until flask --app lab2_app db upgrade >/dev/null 2>&1 || [ $retries -le 0 ]; do
+until flask --app lab2_app db current >/dev/null 2>&1 || [ $retries -le 0 ]; do
   echo "wait for db"
   retries=$((retries-1))
   sleep 2
@@ -12,6 +13,7 @@ done
 
 echo "Strat migration..."
 flask --app lab2_app db upgrade
+flask --app lab2_app create_partitions
 
 if [ "${ADD_TEST_DATA:-0}" = "1" ]; then
   echo "Seeding..."
@@ -19,4 +21,4 @@ if [ "${ADD_TEST_DATA:-0}" = "1" ]; then
 fi
 
 
-exec flask --app lab2_app run --host=0.0.0.0 --port=8000
\ No newline at end of file
+exec sh serve.sh
\ No newline at end of file
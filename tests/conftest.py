@@ -0,0 +1,40 @@
+import pytest
+
+from lab2_app import Tokens, create_app, db
+from lab2_app.Data import test_data as seed
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "JWT_SECRET_KEY": "test-secret-key-long-enough-for-hs256",
+        "MIGRATIONS_ENABLED": False,
+        "OPENAPI_ENABLED": False,
+        "PASSWORD_HASH_ROUNDS": 1000,
+    }
+
+
+@pytest.fixture
+def app(config):
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        seed()
+    yield app
+    Tokens.revocations.stop()
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(client):
+    token = client.post("/login", json={"name": "Nazar", "password": "12345"}).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
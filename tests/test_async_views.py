@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from werkzeug.exceptions import BadRequest
+
+from lab2_app import AsyncViews
+from lab2_app.AsyncViews import asgi_app
+
+
+def _get(asgi, path, headers=None):
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "http_version": "1.1",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi(scope, receive, send))
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return start["status"], dict((k.decode(), v.decode()) for k, v in start["headers"]), body
+
+
+@pytest.fixture
+def asgi(app):
+    return asgi_app(app)
+
+
+@pytest.fixture
+def torn_down(app):
+    # Registered before the auth fixture's login, the app's first request.
+    errors = []
+    app.teardown_request(lambda error: errors.append(error))
+    return errors
+
+
+def test_async_path_matches_sync(asgi, client, auth):
+    for path in ("/users?limit=2", "/record?user_id=1", "/category", "/record/1", "/record/999"):
+        sync = client.get(path, headers=auth)
+        status, _, body = _get(asgi, path, auth)
+        assert (status, body) == (sync.status_code, sync.get_data()), path
+
+
+def test_async_jwt_errors_use_app_handlers(asgi, client):
+    status, headers, body = _get(asgi, "/users")
+    sync = client.get("/users")
+    assert (status, body) == (sync.status_code, sync.get_data())
+    assert headers["content-type"] == "application/json"
+
+
+def test_async_handler_errors_use_app_handlers(torn_down, asgi, auth, monkeypatch):
+    async def broken(session):
+        raise BadRequest("bad cursor")
+
+    monkeypatch.setitem(AsyncViews.HANDLERS, "api.read_people", broken)
+    status, headers, body = _get(asgi, "/users", auth)
+    assert status == 400
+    assert b"bad cursor" in body
+    # The login's teardown, then this request's.
+    assert torn_down == [None, None]
+
+
+def test_async_unexpected_errors_reach_handle_exception(app, asgi, auth, monkeypatch):
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+
+    async def broken(session):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(AsyncViews.HANDLERS, "api.read_people", broken)
+    status, _, _ = _get(asgi, "/users", auth)
+    assert status == 500
@@ -0,0 +1,75 @@
+import json
+
+from sqlalchemy import func, select
+
+from lab2_app import Money, db
+from lab2_app.Models import DailyTotal, Record
+
+WHEN = "2025-11-03T10:00:00+00:00"
+
+
+def _row(user_id=1, category_id=1, amount="10.50"):
+    return {"user_id": user_id, "category_id": category_id, "datetime": WHEN, "amount": amount}
+
+
+def _count(user_id):
+    return db.session.scalar(select(func.count()).select_from(Record).where(Record.user_id == user_id))
+
+
+def _day_total(user_id, category_id):
+    return db.session.execute(
+        select(DailyTotal.count, DailyTotal.amount_sum)
+        .where(DailyTotal.user_id == user_id, DailyTotal.category_id == category_id)
+        .order_by(DailyTotal.day.desc())
+    ).first()
+
+
+def test_bulk_inserts_every_row(app, client, auth):
+    rows = [_row(amount=f"{n}.25") for n in range(1, 11)]
+    response = client.post("/record/bulk", json=rows, headers=auth)
+    assert response.status_code == 200
+    assert response.get_json() == {"inserted": 10, "failed": 0, "errors": []}
+    with app.app_context():
+        assert _count(1) == 12
+        assert tuple(_day_total(1, 1)) == (10, sum(n * 100 + 25 for n in range(1, 11)))
+
+
+def test_ndjson_body_is_accepted(app, client, auth):
+    body = "\n".join(json.dumps(_row(user_id=2)) for _ in range(3)) + "\n"
+    response = client.post("/record/bulk", data=body, headers={**auth, "Content-Type": "application/x-ndjson"})
+    assert response.get_json()["inserted"] == 3
+
+
+def test_bad_rows_fail_on_their_own(app, client, auth):
+    rows = [_row(), _row(amount="-1"), "nope", _row(user_id=999), _row(category_id=999), _row(user_id=2)]
+    body = client.post("/record/bulk", json=rows, headers=auth).get_json()
+    assert body["inserted"] == 2
+    assert [(e["index"], e["error"]) for e in body["errors"]] == [
+        (1, "invalid record data"),
+        (2, "invalid record data"),
+        (3, "user not found"),
+        (4, "category not found"),
+    ]
+
+
+def test_rows_the_database_rejects_fail_on_their_own(app, client, auth, monkeypatch):
+    # Something the lookups can't catch: the CHECK on amount_minor rejects
+    # one row, which used to fail the whole chunk with the same error.
+    to_minor = Money.to_minor
+    monkeypatch.setattr(Money, "to_minor", lambda value: 0 if value == "13.13" else to_minor(value))
+    rows = [_row(amount="1.00"), _row(amount="13.13"), _row(amount="2.00"), _row(amount="13.13")]
+    body = client.post("/record/bulk", json=rows, headers=auth).get_json()
+    assert body["inserted"] == 2
+    assert [e["index"] for e in body["errors"]] == [1, 3]
+    assert all("amount" in e["details"] for e in body["errors"])
+    with app.app_context():
+        assert _count(1) == 4
+        assert tuple(_day_total(1, 1)) == (2, 300)
+
+
+def test_categories_of_other_users_are_refused(app, client, auth):
+    created = client.post("/category", json={"name": "Olena's", "user_id": 2}, headers=auth).get_json()
+    rows = [_row(user_id=2, category_id=created["id"]), _row(user_id=1, category_id=created["id"])]
+    body = client.post("/record/bulk", json=rows, headers=auth).get_json()
+    assert body["inserted"] == 1
+    assert body["errors"] == [{"index": 1, "error": "category not available for this user"}]
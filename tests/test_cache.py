@@ -0,0 +1,60 @@
+import asyncio
+
+from lab2_app.Cache import CategoryCache, MemoryBackend
+
+
+def test_fill_from_before_invalidate_is_not_served():
+    cache = CategoryCache(MemoryBackend())
+
+    def load_racing_a_delete():
+        # Read the listing, then the delete commits and invalidates before
+        # this load writes its (now stale) result back.
+        items = [{"id": 1}]
+        cache.invalidate(7)
+        return items
+
+    assert cache.get_or_load(7, load_racing_a_delete)[1] == [{"id": 1}]
+    assert cache.get_or_load(7, lambda: [])[1] == []
+
+
+def test_async_fill_from_before_invalidate_is_not_served():
+    cache = CategoryCache(MemoryBackend())
+
+    async def load_racing_a_delete():
+        cache.invalidate(None)
+        return [{"id": 1}]
+
+    async def empty():
+        return []
+
+    async def run():
+        await cache.aget_or_load(None, load_racing_a_delete)
+        return await cache.aget_or_load(None, empty)
+
+    assert asyncio.run(run())[1] == []
+
+
+def test_hits_until_invalidated():
+    cache = CategoryCache(MemoryBackend())
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [{"id": len(loads)}]
+
+    first = cache.get_or_load(3, load)
+    assert cache.get_or_load(3, load) == first
+    cache.invalidate(4)
+    assert cache.get_or_load(3, load) == first
+    cache.invalidate(3)
+    assert cache.get_or_load(3, load) != first
+    assert len(loads) == 2
+    assert cache.stats() == {"hits": 2, "misses": 2}
+
+
+def test_evicted_generation_does_not_resurrect_entries():
+    backend = MemoryBackend()
+    cache = CategoryCache(backend)
+    cache.get_or_load(5, lambda: [{"id": "old"}])
+    backend.delete("categories:user:5:gen")
+    assert cache.get_or_load(5, lambda: [{"id": "new"}])[1] == [{"id": "new"}]
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+
+from lab2_app import Deletions, db
+from lab2_app.Models import Deletion, Record, User
+
+
+@pytest.fixture
+def config(config):
+    # Background mode with the worker thread off: the tests drive run_pending.
+    return {**config, "DELETE_MODE": "background", "DELETION_WORKER": False}
+
+
+@pytest.fixture
+def olena(client):
+    token = client.post("/login", json={"name": "Olena", "password": "12345"}).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _records(user_id):
+    return db.session.scalar(select(func.count()).select_from(Record).where(Record.user_id == user_id))
+
+
+def _job(job_id):
+    db.session.expire_all()
+    return db.session.get(Deletion, job_id)
+
+
+def test_user_deletion_runs_to_done(app, client, auth, olena):
+    response = client.delete("/user/1", headers=olena)
+    assert response.status_code == 202
+    job_id = response.get_json()["deletion_id"]
+    assert response.headers["Location"] == f"/deletions/{job_id}"
+
+    # Hidden at once, purged later.
+    assert client.get("/user/1", headers=olena).status_code == 404
+    assert client.get("/users", headers=auth).status_code == 401
+    with app.app_context():
+        assert _records(1) == 2
+        assert client.get(f"/deletions/{job_id}", headers=olena).get_json()["status"] == "pending"
+
+        assert Deletions.run_pending(batch_size=1, pause=0, stale_seconds=60) == 1
+        assert _records(1) == 0
+        assert db.session.get(User, 1) is None
+
+    status = client.get(f"/deletions/{job_id}", headers=olena).get_json()
+    assert (status["status"], status["total"], status["deleted"], status["progress"]) == ("done", 2, 2, 1.0)
+    assert status["attempts"] == 1
+
+
+def test_failing_purge_backs_off_then_fails(app, client, olena, monkeypatch):
+    job_id = client.delete("/user/1", headers=olena).get_json()["deletion_id"]
+
+    def broken(job, batch_size, pause):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(Deletions, "purge", broken)
+    with app.app_context():
+        assert Deletions.run_pending(1, 0, 60, max_attempts=3, retry_seconds=30) == 0
+        job = _job(job_id)
+        assert (job.status, job.attempts, job.error) == ("pending", 1, "disk full")
+        assert job.retry_at is not None
+
+        # Not picked up again before retry_at.
+        assert Deletions.run_pending(1, 0, 60, max_attempts=3, retry_seconds=30) == 0
+        assert _job(job_id).attempts == 1
+
+        for attempt in (2, 3):
+            db.session.execute(update(Deletion).values(retry_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+            db.session.commit()
+            Deletions.run_pending(1, 0, 60, max_attempts=3, retry_seconds=30)
+            assert _job(job_id).attempts == attempt
+
+        job = _job(job_id)
+        assert job.status == "failed"
+        assert Deletions.claim(60, 3) is None
+
+
+def test_backoff_doubles(app, client, olena, monkeypatch):
+    job_id = client.delete("/user/1", headers=olena).get_json()["deletion_id"]
+    monkeypatch.setattr(Deletions, "purge", lambda *args: 1 / 0)
+    with app.app_context():
+        delays = []
+        for _ in range(3):
+            db.session.execute(update(Deletion).values(retry_at=None))
+            db.session.commit()
+            before = datetime.now(timezone.utc)
+            Deletions.run_pending(1, 0, 60, max_attempts=10, retry_seconds=10)
+            retry_at = _job(job_id).retry_at.replace(tzinfo=timezone.utc)
+            delays.append(round((retry_at - before).total_seconds()))
+        assert delays == [10, 20, 40]
+
+
+def test_stale_job_is_resumed_and_counted_as_an_attempt(app, client, olena):
+    job_id = client.delete("/user/1", headers=olena).get_json()["deletion_id"]
+    with app.app_context():
+        stale = datetime.now(timezone.utc) - timedelta(minutes=5)
+        db.session.execute(update(Deletion).values(status="running", attempts=1, updated_at=stale))
+        db.session.commit()
+        assert Deletions.claim(60, 5).id == job_id
+        assert _job(job_id).attempts == 2
+
+        db.session.execute(update(Deletion).values(status="running", attempts=5, updated_at=stale))
+        db.session.commit()
+        assert Deletions.claim(60, 5) is None
+        job = _job(job_id)
+        assert job.status == "failed"
+        assert job.error
+
+
+def test_progress_is_added_in_sql(app, client, olena):
+    job_id = client.delete("/user/1", headers=olena).get_json()["deletion_id"]
+    with app.app_context():
+        job = Deletions.claim(60, 5)
+        # Progress another worker made after this one loaded the job.
+        with db.engine.begin() as conn:
+            conn.execute(update(Deletion.__table__).values(deleted=100))
+        Deletions.purge(job, batch_size=1, pause=0)
+        assert _job(job_id).deleted == 102
+
+
+
+def test_records_of_pending_owners_cannot_be_deleted(app, client, olena):
+    # Seed: record 1 is user 1's, record 3 is in category 4, record 4 neither.
+    assert client.delete("/user/1", headers=olena).status_code == 202
+    assert client.delete("/category", json={"id": 4}, headers=olena).status_code == 202
+
+    assert client.delete("/record/1", headers=olena).status_code == 404
+    assert client.delete("/record/3", headers=olena).status_code == 404
+    assert client.delete("/record/4", headers=olena).status_code == 200
+    with app.app_context():
+        assert db.session.get(Record, 1) is not None
+        assert db.session.get(Record, 3) is not None
+        assert db.session.get(Record, 4) is None
+
+
+def test_names_of_pending_deletions_are_a_conflict(client, olena):
+    assert client.delete("/user/1", headers=olena).status_code == 202
+    response = client.post("/register", json={"name": "Nazar", "password": "12345"})
+    assert response.status_code == 409
+    assert "being deleted" in response.get_json()["error"]
+
+    assert client.delete("/category", json={"id": 2}, headers=olena).status_code == 202
+    response = client.post("/category", json={"name": "Transport"}, headers=olena)
+    assert response.status_code == 409
+    assert "being deleted" in response.get_json()["error"]
+
+    # A live name is still a plain bad request.
+    assert client.post("/register", json={"name": "Ihor", "password": "12345"}).status_code == 400
+    assert client.post("/category", json={"name": "Utilities"}, headers=olena).status_code == 400
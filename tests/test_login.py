@@ -0,0 +1,80 @@
+import os
+import threading
+
+from sqlalchemy import select, update
+
+from lab2_app import db, views
+from lab2_app.Models import User
+from lab2_app.Passwords import pwd_context
+
+
+def test_concurrent_rehash_does_not_fail_login(app, client, monkeypatch):
+    with app.app_context():
+        old_hash = pwd_context.handler().using(rounds=500).hash("12345")
+        db.session.execute(update(User).where(User.name == "Nazar").values(password=old_hash))
+        db.session.commit()
+
+    verify = views.verify_password
+
+    def verify_while_another_login_rehashes(password, hashed):
+        # The other login commits its rehash between our read and write.
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(User.__table__).where(User.__table__.c.name == "Nazar")
+                .values(password=pwd_context.hash("12345"), version=User.__table__.c.version + 1)
+            )
+        return verify(password, hashed)
+
+    monkeypatch.setattr(views, "verify_password", verify_while_another_login_rehashes)
+    response = client.post("/login", json={"name": "Nazar", "password": "12345"})
+    assert response.status_code == 200
+    assert "access_token" in response.get_json()
+
+
+def test_login_rehashes_outdated_hash(app, client):
+    with app.app_context():
+        old_hash = pwd_context.handler().using(rounds=500).hash("12345")
+        db.session.execute(update(User).where(User.name == "Nazar").values(password=old_hash))
+        db.session.commit()
+
+    assert client.post("/login", json={"name": "Nazar", "password": "12345"}).status_code == 200
+    with app.app_context():
+        assert db.session.scalar(select(User.password).where(User.name == "Nazar")) != old_hash
+
+
+def test_saturated_login_slots_leave_reads_served(app, client, auth, monkeypatch):
+    from lab2_app import Config
+
+    assert Config.PASSWORD_VERIFY_SLOTS < int(os.getenv("WEB_THREADS", "4"))
+    slots = app.config["PASSWORD_VERIFY_SLOTS"]
+    entered = threading.Semaphore(0)
+    release = threading.Event()
+    verify = pwd_context.verify_and_update
+
+    def slow_verify(password, hashed):
+        entered.release()
+        release.wait(10)
+        return verify(password, hashed)
+
+    monkeypatch.setattr(pwd_context, "verify_and_update", slow_verify)
+    statuses = []
+
+    def login():
+        statuses.append(app.test_client().post("/login", json={"name": "Olena", "password": "12345"}).status_code)
+
+    threads = [threading.Thread(target=login) for _ in range(slots)]
+    for t in threads:
+        t.start()
+    try:
+        for _ in range(slots):
+            assert entered.acquire(timeout=5)
+
+        busy = client.post("/login", json={"name": "Olena", "password": "12345"})
+        assert busy.status_code == 503
+        assert busy.headers["Retry-After"] == "1"
+        assert client.get("/users", headers=auth).status_code == 200
+    finally:
+        release.set()
+        for t in threads:
+            t.join()
+    assert statuses == [200] * slots
@@ -0,0 +1,78 @@
+import os
+import threading
+
+import pytest
+
+from lab2_app import Metrics, create_app
+
+
+@pytest.fixture
+def profiled(config, tmp_path):
+    app = create_app({
+        **config,
+        "METRICS_ENABLED": True,
+        "PROFILE_ENABLED": True,
+        "PROFILE_DIR": str(tmp_path / "profiles"),
+        "PROFILE_SECRET": "s3cret",
+        "PROFILE_ENDPOINTS": ("/boom",),
+    })
+
+    def boom():
+        raise RuntimeError("boom")
+
+    app.add_url_rule("/boom", "boom", boom)
+    return app, tmp_path / "profiles"
+
+
+def _profiles(directory):
+    return os.listdir(directory) if directory.exists() else []
+
+
+def test_profile_header_without_secret_is_ignored(profiled):
+    app, directory = profiled
+    response = app.test_client().get("/healthcheck", headers={"X-Profile": "1"})
+    assert "X-Profile-File" not in response.headers
+    assert _profiles(directory) == []
+
+
+def test_profile_header_with_secret_writes_a_profile(profiled):
+    app, directory = profiled
+    response = app.test_client().get("/healthcheck", headers={"X-Profile": "s3cret"})
+    name = response.headers["X-Profile-File"]
+    assert "/" not in name
+    assert _profiles(directory) == [name]
+
+
+def test_profile_header_ignored_when_no_secret_configured(profiled):
+    app, directory = profiled
+    app.config["PROFILE_SECRET"] = None
+    response = app.test_client().get("/healthcheck", headers={"X-Profile": ""})
+    assert "X-Profile-File" not in response.headers
+    assert _profiles(directory) == []
+
+
+def _count(metric, *labels):
+    return metric._values[labels]
+
+
+def test_failing_profiled_requests_are_counted_and_stop_their_sampler(profiled):
+    app, directory = profiled
+    client = app.test_client()
+    client.get("/healthcheck")  # starts the per-process side threads
+    errors = _count(Metrics.requests_total, "/boom", "GET", 500)
+    timings = Metrics.request_seconds._series.get(("/boom", "GET"), [None, 0])[1]
+    threads = threading.active_count()
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            client.get("/boom")
+    assert threading.active_count() == threads
+    assert _count(Metrics.requests_total, "/boom", "GET", 500) == errors + 3
+    assert Metrics.request_seconds._series[("/boom", "GET")][1] == timings + 3
+    assert len(_profiles(directory)) == 3
+
+
+def test_handled_errors_keep_their_status(profiled):
+    app, _ = profiled
+    before = _count(Metrics.requests_total, "/users", "GET", 401)
+    assert app.test_client().get("/users").status_code == 401
+    assert _count(Metrics.requests_total, "/users", "GET", 401) == before + 1
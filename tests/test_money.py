@@ -0,0 +1,94 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from marshmallow import ValidationError
+
+from lab2_app import Money, Schemas
+
+
+@pytest.fixture
+def currency():
+    def use(code):
+        Money.configure(SimpleNamespace(config={"MONEY_CURRENCY": code}))
+
+    yield use
+    use("UAH")
+
+
+def _amount(value):
+    return Schemas.record_create_schema.load(
+        {"user_id": 1, "category_id": 1, "datetime": "2025-11-01T10:00:00+00:00", "amount": value}
+    )["amount"]
+
+
+@pytest.mark.parametrize("value, minor", [
+    ("92.3", 9230),
+    ("92.30", 9230),
+    ("0.01", 1),
+    ("1e2", 10000),
+    (Decimal("12.5"), 1250),
+    (Decimal("0.10"), 10),
+    (7, 700),
+    (0.1, 10),
+])
+def test_to_minor(value, minor):
+    assert Money.to_minor(value) == minor
+
+
+@pytest.mark.parametrize("minor, text", [(9230, "92.30"), (5, "0.05"), (0, "0.00"), (-5, "-0.05"), (-123456, "-1234.56")])
+def test_format_minor(minor, text):
+    assert Money.format_minor(minor) == text
+
+
+def test_other_currency_scales(currency):
+    currency("JPY")
+    assert (Money.to_minor("1500"), Money.format_minor(1500)) == (1500, "1500")
+    currency("KWD")
+    assert (Money.to_minor("1.234"), Money.format_minor(1234), Money.format_minor(5)) == (1234, "1.234", "0.005")
+
+
+@pytest.mark.parametrize("total, count, avg", [(5, 2, 3), (-5, 2, -3), (7, 3, 2), (8, 3, 3), (-8, 3, -3), (1, 3, 0)])
+def test_average_rounds_half_away_from_zero(total, count, avg):
+    assert Money.average_minor(total, count) == avg
+
+
+@pytest.mark.parametrize("value, message", [
+    ("0", "amount must be > 0"),
+    ("-1.00", "amount must be > 0"),
+    ("0.001", "amount must have at most 2 decimal places"),
+    ("NaN", "amount is invalid (NaN)"),
+    ("Infinity", "amount must be a number"),
+    ("1,5", "amount must be a number"),
+    ("1e17", "amount is too large"),
+    ("92233720368547758.08", "amount is too large"),
+    (12.5, "Not a valid string."),
+    (12, "Not a valid string."),
+])
+def test_bad_amounts_are_rejected(value, message):
+    with pytest.raises(ValidationError) as e:
+        _amount(value)
+    assert e.value.messages == {"amount": [message]}
+
+
+def test_scale_follows_the_currency(currency):
+    currency("JPY")
+    with pytest.raises(ValidationError):
+        _amount("1.5")
+    assert _amount("15") == "15"
+
+
+@pytest.mark.parametrize("amount, shown", [("12.5", "12.50"), ("0.01", "0.01"), ("92233720368547758.07", "92233720368547758.07")])
+def test_amounts_stay_exact_strings_in_json(client, auth, amount, shown):
+    body = {"user_id": 1, "category_id": 1, "datetime": "2025-11-01T10:00:00+00:00", "amount": amount}
+    created = client.post("/record", json=body, headers=auth)
+    assert created.status_code == 201
+    assert created.get_json()["amount"] == shown
+    assert f'"amount":"{shown}"' in created.get_data(as_text=True).replace(" ", "")
+
+    record = client.get(f"/record/{created.get_json()['record_id']}", headers=auth).get_json()
+    assert record["amount"] == shown
+    summary = client.get(
+        "/record/summary", query_string={"user_id": 1, "from": "2025-11-01T00:00:00+00:00"}, headers=auth
+    ).get_json()
+    assert summary["groups"][0]["sum"] == shown
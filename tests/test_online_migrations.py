@@ -0,0 +1,71 @@
+import pytest
+import sqlalchemy as sa
+
+from lab2_app import OnlineMigrations
+from lab2_app.OnlineMigrations import _build_concurrently, _child_index_name
+
+
+class LockTimeout(Exception):
+    pgcode = "55P03"
+
+
+class FakeBind:
+    # Answers the pg_index lookup from `valid` and records the DDL.
+    def __init__(self, valid, fail=0):
+        self.valid = list(valid)
+        self.fail = fail
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_index" in sql:
+            value = self.valid.pop(0)
+            return type("Result", (), {"scalar": lambda self: value})()
+        self.statements.append(sql)
+        if sql.startswith("CREATE") and self.fail:
+            self.fail -= 1
+            raise sa.exc.OperationalError(sql, {}, LockTimeout())
+
+
+def test_child_index_names_stay_unique_when_truncated():
+    name = "idx_records_user_id_category_id_datetime_amount_minor_covering"
+    first = _child_index_name("records_y2026m02", name)
+    second = _child_index_name("records_y2026m03", name)
+    assert len(first) <= 63 and len(second) <= 63
+    assert first != second
+    assert _child_index_name("records_y2026m02", "ix_records_user_id") == "records_y2026m02_ix_records_user_id"
+
+
+def test_valid_index_is_left_alone():
+    bind = FakeBind([True])
+    _build_concurrently(bind, "INDEX", "ix", "records", "(user_id)")
+    assert bind.statements == []
+
+
+def test_invalid_index_is_dropped_and_rebuilt():
+    bind = FakeBind([False])
+    _build_concurrently(bind, "INDEX", "ix", "records", "(user_id)")
+    assert bind.statements == [
+        "DROP INDEX CONCURRENTLY IF EXISTS ix",
+        "CREATE INDEX CONCURRENTLY ix ON records (user_id)",
+    ]
+
+
+def test_lock_timeout_is_retried(monkeypatch):
+    monkeypatch.setattr(OnlineMigrations, "INDEX_RETRY_PAUSE", 0)
+    # Missing, then left INVALID by the timed-out attempt.
+    bind = FakeBind([None, False], fail=1)
+    _build_concurrently(bind, "INDEX", "ix", "records", "(user_id)")
+    assert bind.statements == [
+        "CREATE INDEX CONCURRENTLY ix ON records (user_id)",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix",
+        "CREATE INDEX CONCURRENTLY ix ON records (user_id)",
+    ]
+
+
+def test_lock_timeout_gives_up_after_attempts(monkeypatch):
+    monkeypatch.setattr(OnlineMigrations, "INDEX_RETRY_PAUSE", 0)
+    bind = FakeBind([None] + [False] * 10, fail=10)
+    with pytest.raises(sa.exc.OperationalError):
+        _build_concurrently(bind, "INDEX", "ix", "records", "(user_id)")
+    assert sum(s.startswith("CREATE") for s in bind.statements) == OnlineMigrations.INDEX_ATTEMPTS
@@ -0,0 +1,15 @@
+from datetime import date
+
+from lab2_app.Partitions import add_months, partition_name
+
+
+def test_create_partitions_is_a_no_op_without_partitioning(app):
+    result = app.test_cli_runner().invoke(args=["create_partitions"])
+    assert result.exit_code == 0
+    assert "nothing to do" in result.output
+
+
+def test_month_arithmetic_and_names():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_name(date(2026, 2, 1)) == "records_y2026m02"
@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from lab2_app import Schemas, db
+from lab2_app.Models import Record
+
+TIED = datetime(2025, 11, 1, 12, 0)
+
+
+def _cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def _pages(client, auth, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/record", query_string=query, headers=auth).get_json()
+        ids += [item["id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.fixture
+def tied(app):
+    # Twelve of user 3's records share one timestamp, so only the id can
+    # order them and split the pages between them.
+    with app.app_context():
+        db.session.add_all([Record(user_id=3, category_id=1, datetime=TIED, amount_minor=100 + n) for n in range(12)])
+        db.session.commit()
+        return sorted(
+            ((r.datetime, r.id) for r in db.session.query(Record).filter_by(user_id=3)), reverse=True
+        )
+
+
+def test_cursor_round_trips():
+    cursor = Schemas.encode_cursor(TIED, 42)
+    assert Schemas.record_query_schema.load({"user_id": 1, "cursor": cursor})["cursor"] == (TIED, 42)
+
+
+def test_pages_walk_tied_timestamps_in_a_stable_order(client, auth, tied):
+    ids, pages = _pages(client, auth, user_id=3, limit=5)
+    assert ids == [record_id for _, record_id in tied]
+    assert pages == 3
+
+
+def test_next_cursor_is_the_last_row_of_the_page(client, auth, tied):
+    body = client.get("/record", query_string={"user_id": 3, "limit": 4}, headers=auth).get_json()
+    assert body["next_cursor"] == Schemas.encode_cursor(*tied[3])
+    last = client.get("/record", query_string={"user_id": 3, "limit": 13}, headers=auth).get_json()
+    assert last["counter"] == 13 and last["next_cursor"] is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    _cursor("2025-11-01T12:00:00"),
+    _cursor(["2025-11-01T12:00:00"]),
+    _cursor(["yesterday", 5]),
+    _cursor(["2025-11-01T12:00:00", "5"]),
+    _cursor(["2025-11-01T12:00:00", 0]),
+    _cursor(["2025-11-01T12:00:00", 5, 6]),
+    Schemas.encode_cursor(TIED, 5)[:-3],
+])
+def test_invalid_or_tampered_cursor_is_a_bad_request(client, auth, cursor):
+    response = client.get("/record", query_string={"user_id": 1, "cursor": cursor}, headers=auth)
+    assert response.status_code == 400
+    assert response.get_json()["details"] == {"cursor": ["cursor is invalid"]}
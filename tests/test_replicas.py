@@ -0,0 +1,102 @@
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+from lab2_app import db
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    # A second SQLite file stands in for the replica: a copy of the primary
+    # plus one row the primary doesn't have, so each read shows its source.
+    return {
+        **config,
+        "DATABASE_REPLICA_URLS": (f"sqlite:///{tmp_path / 'replica.db'}",),
+        "REPLICA_CHECK_INTERVAL": 3600,
+        "REPLICA_STICKY_SECONDS": 60,
+    }
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    with app.app_context():
+        db.engine.dispose()
+    path = tmp_path / "replica.db"
+    shutil.copy(tmp_path / "test.db", path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO categories (name, owner_id) VALUES ('replica only', NULL)")
+        conn.execute("INSERT INTO users (name, password) VALUES ('replica user', 'x')")
+    router = app.extensions["replicas"]
+    router.poll()
+    yield path
+    for r in router.replicas:
+        r.engine.dispose()
+
+
+def _names(response):
+    return {item["category_name"] for item in response.get_json()}
+
+
+def test_replica_reads_do_not_fill_the_category_cache(app, client, auth, replica):
+    position = client.post("/category", json={"name": "fresh"}, headers=auth).headers["X-DB-Position"]
+    # Someone without a position token misses the cache and reads the replica,
+    # which hasn't replayed the write yet...
+    other = app.test_client()
+    assert "replica only" in _names(other.get("/category", headers=auth))
+
+    # ...and the writer, routed to the primary, must not get that listing
+    # back from the cache.
+    names = _names(client.get("/category", headers={**auth, "X-DB-Position": position}))
+    assert "fresh" in names
+    assert "replica only" not in names
+
+
+def test_pool_status_needs_a_token_and_hides_replica_details(client, auth, replica):
+    assert client.get("/db/pool").status_code == 401
+
+    response = client.get("/db/pool", headers=auth)
+    assert response.status_code == 200
+    [status] = response.get_json()["replicas"]
+    assert status["healthy"] is True
+    assert "url" not in status and "error" not in status
+    assert str(replica) not in response.get_data(as_text=True)
+
+
+def _people(response):
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_reads_go_to_the_replica(client, auth, replica):
+    assert "replica user" in _people(client.get("/users", headers=auth))
+
+
+def test_a_fresh_position_token_reads_from_the_primary(client, auth, replica):
+    fresh = {**auth, "X-DB-Position": f"t:{time.time():.3f}"}
+    assert "replica user" not in _people(client.get("/users", headers=fresh))
+
+    expired = {**auth, "X-DB-Position": f"t:{time.time() - 3600:.3f}"}
+    assert "replica user" in _people(client.get("/users", headers=expired))
+
+
+def test_a_write_keeps_the_writer_on_the_primary(client, auth, replica):
+    response = client.post("/register", json={"name": "Taras", "password": "12345"})
+    assert response.status_code == 201
+    assert response.headers["X-DB-Position"].startswith("t:")
+    # The cookie set with it routes this client's next reads.
+    people = _people(client.get("/users", headers=auth))
+    assert "Taras" in people and "replica user" not in people
+
+
+def test_writes_never_go_to_the_replica(app, client, auth, replica):
+    assert client.post("/register", json={"name": "Taras", "password": "12345"}).status_code == 201
+    assert client.post("/category", json={"name": "fresh"}, headers=auth).status_code == 201
+
+    with sqlite3.connect(replica) as conn:
+        assert conn.execute("SELECT count(*) FROM users WHERE name = 'Taras'").fetchone() == (0,)
+        assert conn.execute("SELECT count(*) FROM categories WHERE name = 'fresh'").fetchone() == (0,)
+    with sqlite3.connect(replica.with_name("test.db")) as conn:
+        assert conn.execute("SELECT count(*) FROM users WHERE name = 'Taras'").fetchone() == (1,)
+        assert conn.execute("SELECT count(*) FROM categories WHERE name = 'fresh'").fetchone() == (1,)
@@ -0,0 +1,108 @@
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from lab2_app import Rollup, db, views
+from lab2_app.Models import DailyTotal, Record
+
+
+@pytest.fixture
+def around_midnight(client, auth):
+    # User 1 also has a seed record on 2025-10-27 at 18:20 (92.30).
+    for when, amount in (("2025-10-27T00:00:00+00:00", "10.00"), ("2025-10-26T23:59:59+00:00", "5.00")):
+        body = {"user_id": 1, "category_id": 1, "datetime": when, "amount": amount}
+        assert client.post("/record", json=body, headers=auth).status_code == 201
+
+
+def _days(client, auth, **params):
+    response = client.get("/record/summary", query_string={"user_id": 1, "group_by": "day", **params}, headers=auth)
+    assert response.status_code == 200, response.get_json()
+    return [(g["bucket"], g["count"], g["sum"]) for g in response.get_json()["groups"]]
+
+
+@pytest.mark.parametrize("tz", [None, "UTC", "Europe/London"])
+def test_record_at_midnight_starts_its_day(client, auth, around_midnight, tz):
+    # On 2025-10-27 London is on GMT, so its local days are the UTC ones and
+    # the answer is the same whichever path serves the query.
+    extra = {"tz": tz} if tz else {}
+    assert _days(client, auth, **extra, **{"from": "2025-10-27T00:00:00+00:00", "to": "2025-10-28T00:00:00+00:00"}) == [
+        ("2025-10-27", 2, "102.30"),
+    ]
+    assert _days(client, auth, **extra, **{"from": "2025-10-26T00:00:00+00:00", "to": "2025-10-27T00:00:00+00:00"}) == [
+        ("2025-10-26", 1, "5.00"),
+    ]
+
+
+def test_non_utc_zone_reads_records(client, auth, monkeypatch):
+    def no_rollup(params, group_by):
+        raise AssertionError("the daily rollup is in UTC days")
+
+    monkeypatch.setattr(views, "_summary_from_rollup", no_rollup)
+    assert _days(client, auth, tz="Europe/Kyiv") == [("2025-10-25", 1, "420.75"), ("2025-10-27", 1, "92.30")]
+
+
+def test_postgres_buckets_in_local_time(monkeypatch):
+    # SQLite buckets in stored time; the Postgres expression is checked here.
+    monkeypatch.setattr(views, "db", SimpleNamespace(engine=SimpleNamespace(dialect=postgresql.dialect())))
+    expr = views._bucket_expr(views.Record.datetime, "day", "Europe/Kyiv")
+    sql = str(expr.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert sql == "to_char(date_trunc('day', timezone('Europe/Kyiv', records.datetime)), 'YYYY-MM-DD')"
+
+
+@pytest.mark.parametrize("tz", ["Mars/Olympus", "", "../../etc/passwd", "UTC+2"])
+def test_unknown_zone_is_a_bad_request(client, auth, tz):
+    response = client.get("/record/summary", query_string={"user_id": 1, "tz": tz}, headers=auth)
+    assert response.status_code == 400
+    assert response.get_json()["details"] == {"tz": ["unknown time zone"]}
+
+
+def _summary(client, auth, **params):
+    response = client.get("/record/summary", query_string={"user_id": 1, **params}, headers=auth)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()["groups"]
+
+
+def _rollup_rows():
+    return db.session.execute(
+        select(DailyTotal.user_id, DailyTotal.category_id, DailyTotal.day, DailyTotal.count,
+               DailyTotal.amount_sum, DailyTotal.amount_min, DailyTotal.amount_max)
+        .where(DailyTotal.count > 0)
+        .order_by(DailyTotal.user_id, DailyTotal.category_id, DailyTotal.day)
+    ).all()
+
+
+@pytest.mark.parametrize("group_by", ["category", "day", "week", "month", "category,day"])
+def test_rollup_matches_records(app, client, auth, group_by):
+    rng = random.Random(group_by)
+    start = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+    def row():
+        when = start + timedelta(minutes=rng.randrange(90 * 24 * 60))
+        return {"user_id": 1, "category_id": rng.randint(1, 6), "datetime": when.isoformat(),
+                "amount": f"{rng.randint(1, 500)}.{rng.randrange(100):02d}"}
+
+    for _ in range(20):
+        assert client.post("/record", json=row(), headers=auth).status_code == 201
+    assert client.post("/record/bulk", json=[row() for _ in range(200)], headers=auth).get_json()["failed"] == 0
+    with app.app_context():
+        ids = db.session.scalars(select(Record.id).where(Record.user_id == 1)).all()
+    for record_id in rng.sample(ids, 60):
+        assert client.delete(f"/record/{record_id}", headers=auth).status_code == 200
+
+    # "Etc/GMT" is UTC under another name, which sends the query to the
+    # records instead of the rollup.
+    window = {"from": "2025-09-15T00:00:00+00:00", "to": "2025-11-15T00:00:00+00:00"}
+    for params in ({"group_by": group_by}, {"group_by": group_by, **window}):
+        from_rollup = _summary(client, auth, **params)
+        assert from_rollup
+        assert _summary(client, auth, tz="Etc/GMT", **params) == from_rollup
+
+    with app.app_context():
+        maintained = _rollup_rows()
+        Rollup.rebuild()
+        assert _rollup_rows() == maintained
+    assert _summary(client, auth, group_by=group_by) == _summary(client, auth, tz="Etc/GMT", group_by=group_by)
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from lab2_app import Tokens, db
+from lab2_app.Models import RevokedUser
+from lab2_app.Tokens import BloomFilter, RevocationList
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    for key in range(0, 2000, 2):
+        bloom.add(key)
+    assert all(key in bloom for key in range(0, 2000, 2))
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(10_000, 0.01)
+    for key in range(10_000):
+        bloom.add(key)
+    false_positives = sum(key in bloom for key in range(10_000, 60_000))
+    assert false_positives / 50_000 < 0.02
+
+
+def _revoke_in_table(user_id, revoked_at):
+    db.session.add(RevokedUser(user_id=user_id, revoked_at=revoked_at))
+    db.session.commit()
+
+
+def test_sync_rereads_overlap_window(app):
+    revocations = RevocationList(app, sync_interval=60, overlap=60)
+    with app.app_context():
+        revocations.sync()
+        assert 1 not in revocations.bloom
+        watermark = revocations._synced_at
+
+        # Committed after the last sync, stamped before it: a transaction
+        # that started earlier and finished late.
+        _revoke_in_table(1, watermark - timedelta(seconds=30))
+        # Older than the overlap: what the previous sync already covered.
+        _revoke_in_table(2, watermark - timedelta(seconds=120))
+        revocations.sync()
+
+        assert 1 in revocations.bloom
+        assert revocations.is_revoked(1, (watermark - timedelta(seconds=60)).timestamp())
+        assert 2 not in revocations.bloom
+
+
+def test_sync_rereads_without_double_counting(app):
+    revocations = RevocationList(app, capacity=10, sync_interval=60, overlap=60)
+    with app.app_context():
+        revocations.sync()
+        _revoke_in_table(1, datetime.now(timezone.utc))
+        for _ in range(20):
+            revocations.sync()
+        assert revocations.bloom.count == 1
+        assert revocations.bloom.capacity == 10
+
+
+def test_sync_grows_filter_past_capacity(app):
+    revocations = RevocationList(app, capacity=4, sync_interval=60)
+    with app.app_context():
+        now = datetime.now(timezone.utc)
+        for user_id in range(100, 110):
+            _revoke_in_table(user_id, now)
+        revocations.sync()
+        assert revocations.bloom.capacity >= 10
+        assert all(user_id in revocations.bloom for user_id in range(100, 110))
+
+
+def test_token_issued_after_revocation_is_valid(app):
+    revocations = RevocationList(app)
+    revoked_at = datetime.now(timezone.utc)
+    revocations.revoke(7, revoked_at)
+    with app.app_context():
+        revocations.sync()
+        assert revocations.is_revoked(7, revoked_at.timestamp() - 1)
+        assert revocations.is_revoked(7, revoked_at.timestamp())
+        assert not revocations.is_revoked(7, revoked_at.timestamp() + 1)
+
+
+def test_unknown_user_before_first_sync_is_checked(app):
+    revocations = RevocationList(app)
+    with app.app_context():
+        _revoke_in_table(3, datetime.now(timezone.utc))
+        assert revocations.is_revoked(3, 0)
+        assert not revocations.is_revoked(4, 0)
+
+
+def test_lookups_on_event_loop_raise_instead_of_querying(app):
+    revocations = RevocationList(app)
+    with app.app_context():
+        revocations.sync()
+        _revoke_in_table(5, datetime.now(timezone.utc))
+        revocations.revoke(5, datetime.now(timezone.utc))
+        with Tokens.on_event_loop():
+            assert not revocations.is_revoked(6, 0)
+            assert revocations.is_revoked(5, 0)
+            with pytest.raises(Tokens.WouldBlock):
+                Tokens.lookup_user(1)
+        assert Tokens.lookup_user(1)["name"] == "Nazar"
+        with Tokens.on_event_loop():
+            assert Tokens.lookup_user(1)["name"] == "Nazar"
+
+
+def test_deleted_user_token_is_rejected(client, auth):
+    assert client.get("/users", headers=auth).status_code == 200
+    assert client.delete("/user/1", headers=auth).status_code == 200
+    assert client.get("/users", headers=auth).status_code == 401
@@ -0,0 +1,18 @@
+def test_users_etag_changes_when_next_page_appears(client, auth):
+    first = client.get("/users?limit=6", headers=auth)
+    assert first.get_json()["has_more"] is False
+    etag = first.headers["ETag"]
+    assert client.get("/users?limit=6", headers={**auth, "If-None-Match": etag}).status_code == 304
+
+    assert client.post("/user", json={"name": "Taras", "password": "12345"}, headers=auth).status_code == 201
+    again = client.get("/users?limit=6", headers={**auth, "If-None-Match": etag})
+    assert again.status_code == 200
+    assert again.get_json()["has_more"] is True
+    assert again.get_json()["next_cursor"] is not None
+    assert again.headers["ETag"] != etag
+
+
+def test_users_etag_differs_per_page(client, auth):
+    etag = client.get("/users?limit=2", headers=auth).headers["ETag"]
+    assert client.get("/users?limit=2", headers={**auth, "If-None-Match": etag}).status_code == 304
+    assert client.get("/users?limit=3", headers={**auth, "If-None-Match": etag}).status_code == 200
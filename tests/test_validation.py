@@ -0,0 +1,127 @@
+"""Differential check of the compiled validators against marshmallow.
+
+Every schema in Schemas is loaded both ways over seeded random payloads
+built from valid, borderline and wrong values for its fields; the results,
+or the error messages and valid_data, must be identical.
+"""
+import copy
+import random
+from datetime import datetime, timezone
+
+import pytest
+from marshmallow import ValidationError, fields
+
+from lab2_app import Schemas
+from lab2_app.Validation import CompiledSchema
+
+PAYLOADS_PER_SCHEMA = 3000
+
+INTEGERS = [1, 2, 7, 1000, 1001, 10 ** 12, 0, -1, True, False, 1.0, 2.5, "1", " 1 ", "", None, [], {}]
+STRINGS = [
+    "x", " padded ", "", "   ", "a" * 64, "a" * 65, "a" * 128, "a" * 129, "abcd", "abc",
+    "json", "ndjson", " ndjson ", "xml", "Europe/Kyiv", "UTC", "Nope/Zone", "../etc",
+    "12.50", "12.505", "0", "0.00", "-1", "1e3", "1e-3", "NaN", "Infinity", "99999999999999999999",
+    1, 1.5, True, None, ["a"], {"a": 1},
+]
+DATETIMES = [
+    "2025-10-25T08:30:00", "2025-10-25 08:30:00", "2025-10-25T08:30:00Z", "2025-10-25T08:30:00.123+02:00",
+    "2025-10-25T08:30:00.123456-05:30", "2025-10-25T08:30:00+0200", "2025-10-25T08:30",
+    "2025-10-25T08:30:00.1234567", "2025-10-25", "2025-13-01T00:00:00", "2025-02-30T00:00:00",
+    "2025-10-25T24:00:00", " 2025-10-25T08:30:00 ", "garbage", "", 1761381000, None, True,
+]
+LISTS = [["day"], ["category", "day"], ["day", "week"], ["category"], [], ["nope"], [1], [None], "day", None]
+CURSORS = [
+    Schemas.encode_cursor(datetime(2025, 10, 25, 8, 30, tzinfo=timezone.utc), 5),
+    Schemas.encode_cursor(datetime(2025, 10, 25), 0),
+    Schemas.encode_id_cursor(3), Schemas.encode_id_cursor(0), Schemas.encode_id_cursor("3"),
+    "not-base64!", "", "W10", 5, None,
+]
+EVERYTHING = INTEGERS + STRINGS + DATETIMES + LISTS + CURSORS
+
+
+def _pool(field):
+    if isinstance(field, fields.Integer):
+        return INTEGERS
+    if isinstance(field, fields.DateTime):
+        return DATETIMES
+    if isinstance(field, fields.List):
+        return LISTS
+    if isinstance(field, fields.String):
+        return STRINGS
+    return CURSORS
+
+
+def _payload(rng, schema):
+    if rng.random() < 0.02:
+        return rng.choice([None, [], "x", 1])
+    data = {}
+    for attr, field in schema.load_fields.items():
+        key = field.data_key or attr
+        roll = rng.random()
+        if roll < 0.15:
+            continue
+        data[key] = rng.choice(EVERYTHING if roll > 0.9 else _pool(field))
+    if rng.random() < 0.05:
+        data[rng.choice(["extra", "id", "USER_ID", ""])] = rng.choice(EVERYTHING)
+    return data
+
+
+def _outcome(load, data):
+    try:
+        return "ok", _normalize(load(copy.deepcopy(data)))
+    except ValidationError as e:
+        return "error", e.messages, _normalize(e.valid_data)
+    except Exception as e:
+        # Some pre_load hooks assume a dict; both sides must fail alike.
+        return "raised", type(e)
+
+
+def _normalize(value):
+    # datetimes compare equal across timezones; the offset must match too.
+    if isinstance(value, datetime):
+        return value, value.utcoffset()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_normalize(v) for v in value)
+    return value
+
+
+SCHEMAS = sorted(
+    (name, value) for name, value in vars(Schemas).items()
+    if isinstance(value, CompiledSchema) and not value.many
+)
+
+
+def test_every_schema_is_covered():
+    assert len(SCHEMAS) >= 12
+
+
+@pytest.mark.parametrize("name, schema", SCHEMAS, ids=[name for name, _ in SCHEMAS])
+def test_compiled_matches_marshmallow(name, schema):
+    reference = type(schema.schema)()
+    rng = random.Random(name)
+    for _ in range(PAYLOADS_PER_SCHEMA):
+        data = _payload(rng, reference)
+        assert _outcome(schema.load, data) == _outcome(reference.load, data), data
+
+
+def test_compiled_bulk_matches_marshmallow():
+    schema = Schemas.record_bulk_schema
+    reference = type(schema.schema)(many=True)
+    rng = random.Random("bulk")
+    for _ in range(300):
+        items = [_payload(rng, reference) for _ in range(rng.randint(0, 8))]
+        assert _outcome(schema.load, items) == _outcome(reference.load, items), items
+    for data in ({}, None, "x", [[]]):
+        assert _outcome(schema.load, data) == _outcome(reference.load, data)
+
+
+def test_fast_path_accepts_canonical_payloads():
+    # The compiled path must not be silently disabled for the hot schemas.
+    for schema in (Schemas.record_create_schema, Schemas.record_query_schema, Schemas.user_query_schema):
+        assert schema._load_one is not None
+    payload = {"user_id": 1, "category_id": 2, "datetime": "2025-10-25T08:30:00Z", "amount": "12.50"}
+    assert Schemas.record_create_schema._load_one(payload)["datetime"] == datetime(
+        2025, 10, 25, 8, 30, tzinfo=timezone.utc
+    )